@@ -0,0 +1,14 @@
+from rest_framework.parsers import JSONParser
+
+
+class CachedJSONParser(JSONParser):
+    """
+    JSONParser that reuses the body already parsed by APISecurityMiddleware.
+    Falls back to normal parsing (and its error handling) when nothing was cached.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = (parser_context or {}).get('request')
+        cached = getattr(getattr(request, '_request', None), '_cached_json', None)
+        if cached is not None:
+            return cached
+        return super().parse(stream, media_type, parser_context)
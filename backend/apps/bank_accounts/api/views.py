@@ -319,7 +319,7 @@ class BankTransactionViewSet(viewsets.ModelViewSet):
         # Get IP address
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
+            ip_address = x_forwarded_for.partition(',')[0]
         else:
             ip_address = request.META.get('REMOTE_ADDR', '127.0.0.1')
 
@@ -346,7 +346,7 @@ class BankTransactionViewSet(viewsets.ModelViewSet):
         # Get IP address
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
+            ip_address = x_forwarded_for.partition(',')[0]
         else:
             ip_address = request.META.get('REMOTE_ADDR', '127.0.0.1')
 
@@ -425,7 +425,7 @@ class BankTransactionViewSet(viewsets.ModelViewSet):
         # Get IP address
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
+            ip_address = x_forwarded_for.partition(',')[0]
         else:
             ip_address = request.META.get('REMOTE_ADDR', '127.0.0.1')
 
@@ -486,7 +486,7 @@ class BankTransactionViewSet(viewsets.ModelViewSet):
         # Get IP address
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
+            ip_address = x_forwarded_for.partition(',')[0]
         else:
             ip_address = request.META.get('REMOTE_ADDR', '127.0.0.1')
 
@@ -1179,7 +1179,7 @@ class TransactionApprovalViewSet(viewsets.ModelViewSet):
         """Extract client IP address from request"""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
+            ip = x_forwarded_for.partition(',')[0]
         else:
             ip = request.META.get('REMOTE_ADDR')
         return ip
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# SearchFilter on BankTransactionViewSet runs icontains on these columns, which
+# PostgreSQL compiles to UPPER(col) LIKE UPPER('%term%'). Trigram GIN indexes
+# on the same UPPER() expressions let it use a bitmap index scan instead of a
+# sequential scan of bank_transactions.
+SEARCH_FIELDS = ['description', 'reference_number', 'bank_reference']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bank_accounts', '0002_remove_check_number'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ] + [
+        migrations.RunSQL(
+            sql=(
+                f"CREATE INDEX IF NOT EXISTS idx_bank_transactions_{field}_trgm "
+                f"ON bank_transactions USING gin (UPPER({field}) gin_trgm_ops);"
+            ),
+            reverse_sql=f"DROP INDEX IF EXISTS idx_bank_transactions_{field}_trgm;",
+        )
+        for field in SEARCH_FIELDS
+    ]
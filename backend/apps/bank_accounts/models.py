@@ -320,18 +320,7 @@ class BankTransaction(models.Model):
             prefix = self.transaction_type[:4].upper()
 
             # Find the highest existing transaction number for this year and type
-            max_number = 0
-            existing_transactions = BankTransaction.objects.filter(
-                transaction_number__startswith=f'{prefix}-{current_year}'
-            ).values_list('transaction_number', flat=True)
-
-            for transaction_number in existing_transactions:
-                try:
-                    num = int(transaction_number.split('-')[2])
-                    if num > max_number:
-                        max_number = num
-                except (ValueError, IndexError):
-                    continue
+            max_number = self.highest_transaction_number(prefix, current_year)
 
             # Generate unique transaction number by incrementing from max
             next_number = max_number + 1
@@ -368,9 +357,7 @@ class BankTransaction(models.Model):
 
         # Auto-generate bank reference if not provided and this is a new transaction
         if not self.bank_reference and not self.pk:
-            from datetime import datetime
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            self.bank_reference = f"BANK-{timestamp}-{self.pk or 'NEW'}"
+            self.bank_reference = self.new_bank_reference()
 
         # Note: reference_number is now the single field for check numbers
         # No synchronization needed as deprecated check_number field was removed
@@ -531,6 +518,35 @@ class BankTransaction(models.Model):
                 logger = logging.getLogger(__name__)
                 logger.error(f"Fraud detection failed for transaction {self.pk}: {str(e)}")
 
+    @classmethod
+    def highest_transaction_number(cls, prefix, year):
+        """
+        Return the highest sequence number used by ``{prefix}-{year}-NNN``
+
+        Lets bulk inserts (e.g. seeding via bulk_create) number transactions
+        up front the same way save() does.
+        """
+        max_number = 0
+        existing_transactions = cls.objects.filter(
+            transaction_number__startswith=f'{prefix}-{year}'
+        ).values_list('transaction_number', flat=True)
+
+        for transaction_number in existing_transactions:
+            try:
+                num = int(transaction_number.split('-')[2])
+                if num > max_number:
+                    max_number = num
+            except (ValueError, IndexError):
+                continue
+        return max_number
+
+    @staticmethod
+    def new_bank_reference():
+        """Bank reference assigned to a new transaction that has no pk yet"""
+        from datetime import datetime
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        return f"BANK-{timestamp}-NEW"
+
     @property
     def is_debit(self):
         """Returns True if this transaction decreases the account balance"""
@@ -611,6 +627,12 @@ class BankTransaction(models.Model):
 
     def _create_audit_log(self, is_new, old_instance, audit_user, audit_reason, audit_ip):
         """Create audit log entry for this transaction change"""
+        audit = self._build_audit_log(is_new, old_instance, audit_user, audit_reason, audit_ip)
+        if audit is not None:
+            audit.save()
+
+    def _build_audit_log(self, is_new, old_instance, audit_user, audit_reason, audit_ip):
+        """Return the unsaved audit log entry for this change, or None if nothing changed"""
         # Determine action type
         if is_new:
             action = 'CREATED'
@@ -637,7 +659,7 @@ class BankTransaction(models.Model):
                 new_snapshot = self._get_snapshot()
                 if old_values == new_snapshot and action == 'UPDATED':
                     # Nothing changed, don't create audit log
-                    return
+                    return None
             else:
                 action = 'UPDATED'
                 old_values = None
@@ -653,8 +675,8 @@ class BankTransaction(models.Model):
         # Determine user (from audit_user parameter, or try to get from Django's thread local)
         user = audit_user or 'system'
 
-        # Create the audit log
-        BankTransactionAudit.objects.create(
+        # Build the audit log
+        return BankTransactionAudit(
             transaction=self,
             action=action,
             action_by=user,
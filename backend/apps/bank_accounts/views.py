@@ -504,7 +504,7 @@ def void_bank_transaction(request, pk):
         # Get client IP address
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
-            ip_address = x_forwarded_for.split(',')[0]
+            ip_address = x_forwarded_for.partition(',')[0]
         else:
             ip_address = request.META.get('REMOTE_ADDR', '127.0.0.1')
 
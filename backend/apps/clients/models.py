@@ -199,22 +199,31 @@ class Client(models.Model):
     def save(self, *args, **kwargs):
         if not self.client_number:
             # Auto-generate client number with atomic operation
-            from django.db import transaction
-            with transaction.atomic():
-                # Lock the table to prevent race conditions
-                last_client = Client.objects.select_for_update().order_by('-id').first()
-                if last_client and last_client.client_number:
-                    try:
-                        last_num = int(last_client.client_number.split('-')[1])
-                        self.client_number = f"CL-{last_num + 1:03d}"
-                    except (ValueError, IndexError):
-                        # Fallback to count if parsing fails
-                        count = Client.objects.select_for_update().count()
-                        self.client_number = f"CL-{count + 1:03d}"
-                else:
-                    self.client_number = "CL-001"
+            self.client_number = self.bulk_next_numbers(1)[0]
         super().save(*args, **kwargs)
 
+    @classmethod
+    def bulk_next_numbers(cls, count):
+        """
+        Reserve the next ``count`` client numbers with a single lookup
+
+        Lets bulk inserts (e.g. seeding via bulk_create) number all clients
+        up front instead of running the lookup once per save().
+        """
+        from django.db import transaction
+        with transaction.atomic():
+            # Lock the table to prevent race conditions
+            last_client = Client.objects.select_for_update().order_by('-id').first()
+            if last_client and last_client.client_number:
+                try:
+                    last_num = int(last_client.client_number.split('-')[1])
+                except (ValueError, IndexError):
+                    # Fallback to count if parsing fails
+                    last_num = Client.objects.select_for_update().count()
+            else:
+                last_num = 0
+        return [f"CL-{num:03d}" for num in range(last_num + 1, last_num + count + 1)]
+
 
 class Case(models.Model):
     CASE_STATUS_CHOICES = [
@@ -329,6 +338,18 @@ class Case(models.Model):
     
     def _generate_case_number(self):
         """Generate auto-incremental case number atomically - never reuse deleted numbers"""
+        return self.bulk_next_numbers(1)[0]
+
+    @classmethod
+    def bulk_next_numbers(cls, count):
+        """
+        Reserve the next ``count`` case numbers with a single MAX lookup
+
+        Lets bulk inserts (e.g. seeding via bulk_create) number all cases up
+        front instead of running the lookup once per save(). Call inside the
+        transaction that inserts the cases so the FOR UPDATE lock is held
+        until they are written.
+        """
         from django.db import transaction, connection
 
         # Use atomic transaction to prevent race conditions
@@ -356,9 +377,8 @@ class Case(models.Model):
                 else:
                     highest_num = 0
 
-            # Generate next number (start from 1 if no existing CASE- numbers)
-            next_num = highest_num + 1
-            return f"CASE-{next_num:06d}"  # 6-digit zero-padded
+            # Generate next numbers (start from 1 if no existing CASE- numbers)
+            return [f"CASE-{num:06d}" for num in range(highest_num + 1, highest_num + count + 1)]  # 6-digit zero-padded
     
     def _create_case_deposit(self):
         """Create automatic deposit transaction for this case"""
@@ -2,8 +2,9 @@ from django.db import models
 from django.core.validators import RegexValidator
 from django.db import transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.core.cache import cache
 
 
 # US State choices - 2-letter codes only
@@ -24,6 +25,10 @@ US_STATES = [
 ]
 
 
+ACTIVE_LAW_FIRM_CACHE_KEY = 'active_law_firm'
+ACTIVE_LAW_FIRM_CACHE_TIMEOUT = 300  # 5 minutes
+
+
 class LawFirm(models.Model):
     """Law firm information for trust account compliance and reporting"""
     firm_name = models.CharField(max_length=200, help_text="Full legal name of the law firm")
@@ -126,6 +131,28 @@ class LawFirm(models.Model):
         """Get the active law firm"""
         return cls.objects.filter(is_active=True).first()
 
+    @classmethod
+    def get_cached_active_firm(cls):
+        """
+        Get the active law firm from the shared cache, falling back to the database
+
+        The instance is stored in Django-serialized form, since model
+        instances cannot be packed by the cache's msgpack serializer, and an
+        empty string records that no firm is active.
+        Entries are invalidated whenever a LawFirm is saved or deleted.
+        """
+        from django.core import serializers
+
+        data = cache.get(ACTIVE_LAW_FIRM_CACHE_KEY)
+        if data is None:
+            firm = cls.get_active_firm()
+            data = serializers.serialize('json', [firm]) if firm else ''
+            cache.set(ACTIVE_LAW_FIRM_CACHE_KEY, data, ACTIVE_LAW_FIRM_CACHE_TIMEOUT)
+            return firm
+        if not data:
+            return None
+        return next(serializers.deserialize('json', data)).object
+
 
 class Setting(models.Model):
     category = models.CharField(max_length=50)
@@ -652,3 +679,10 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
     """Automatically create UserProfile when User is created"""
     if created:
         UserProfile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=LawFirm)
+@receiver(post_delete, sender=LawFirm)
+def invalidate_active_law_firm_cache(sender, **kwargs):
+    """Drop the cached active law firm whenever firm details change"""
+    cache.delete(ACTIVE_LAW_FIRM_CACHE_KEY)
@@ -114,13 +114,24 @@ class Vendor(models.Model):
                     self.vendor_number = f"CV-{self.client.id:03d}"
             else:
                 # Regular vendor
-                last_vendor = Vendor.objects.filter(vendor_number__startswith='VEN-').order_by('-id').first()
-                if last_vendor and last_vendor.vendor_number:
-                    try:
-                        last_num = int(last_vendor.vendor_number.split('-')[1])
-                        self.vendor_number = f"VEN-{last_num + 1:03d}"
-                    except (ValueError, IndexError):
-                        self.vendor_number = f"VEN-{Vendor.objects.filter(client__isnull=True).count() + 1:03d}"
-                else:
-                    self.vendor_number = "VEN-001"
-        super().save(*args, **kwargs)
\ No newline at end of file
+                self.vendor_number = self.bulk_next_numbers(1)[0]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bulk_next_numbers(cls, count):
+        """
+        Reserve the next ``count`` regular (VEN-) vendor numbers with one lookup
+
+        Lets bulk inserts (e.g. seeding via bulk_create) number all vendors
+        up front instead of running the lookup once per save(). Client
+        vendors (CV-) are still numbered by save().
+        """
+        last_vendor = Vendor.objects.filter(vendor_number__startswith='VEN-').order_by('-id').first()
+        if last_vendor and last_vendor.vendor_number:
+            try:
+                last_num = int(last_vendor.vendor_number.split('-')[1])
+            except (ValueError, IndexError):
+                last_num = Vendor.objects.filter(client__isnull=True).count()
+        else:
+            last_num = 0
+        return [f"VEN-{num:03d}" for num in range(last_num + 1, last_num + count + 1)]
@@ -5,3 +5,4 @@ timeout = 120
 accesslog = "/app/logs/gunicorn-access.log"
 errorlog = "/app/logs/gunicorn-error.log"
 loglevel = "info"
+preload_app = True  # Import Django once in the master; workers share its pages copy-on-write
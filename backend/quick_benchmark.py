@@ -12,14 +12,37 @@ from datetime import datetime
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trust_account_project.settings')
 django.setup()
 
-from django.db import transaction
+from django.db import transaction, connection
 from apps.clients.models import Client
 
 def cleanup_test_data():
-    """Remove any existing test data"""
+    """Remove any existing test data
+
+    Uses a single raw DELETE instead of the ORM's collect-then-cascade
+    delete. The predicate is a prefix match on client_number, which is
+    covered by the unique index (and its varchar_pattern_ops companion
+    index on PostgreSQL), so no sequential scan is needed.
+    """
     print("🧹 Cleaning test data...")
-    deleted = Client.objects.filter(first_name__startswith='TEST_').delete()
-    print(f"   Deleted {deleted[0]} test records")
+    clients_table = connection.ops.quote_name(Client._meta.db_table)
+    assigned_table = connection.ops.quote_name(Client.assigned_users.through._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Benchmark clients never get user assignments, but clear the M2M
+        # rows anyway since there is no ON DELETE CASCADE at the DB level.
+        # No committed migration creates this table yet, so skip it when a
+        # database built from migrations doesn't have it.
+        if Client.assigned_users.through._meta.db_table in connection.introspection.table_names(cursor):
+            cursor.execute(
+                f"DELETE FROM {assigned_table} WHERE client_id IN "
+                f"(SELECT id FROM {clients_table} WHERE client_number LIKE %s)",
+                ['TEST-%']
+            )
+        cursor.execute(
+            f"DELETE FROM {clients_table} WHERE client_number LIKE %s",
+            ['TEST-%']
+        )
+        deleted = cursor.rowcount
+    print(f"   Deleted {deleted} test records")
 
 def generate_sequential_number(num):
     """Traditional sequential: 1, 2, 3, 4, 5..."""
@@ -39,6 +62,7 @@ def test_insert_performance(strategy, count=500):
     start_time = time.time()
     created_count = 0
     error_count = 0
+    numbers = []
     
     for i in range(1, count + 1):
         try:
@@ -52,11 +76,11 @@ def test_insert_performance(strategy, count=500):
             with transaction.atomic():
                 client = Client.objects.create(
                     client_number=client_number,
-                    first_name=f'TEST_{strategy.upper()}',
-                    last_name=f'User{i:04d}',
+                    client_name=f'TEST {strategy.upper()} User{i:04d}',
                     is_active=True
                 )
                 created_count += 1
+                numbers.append(client_number)
                 
         except Exception as e:
             error_count += 1
@@ -80,7 +104,7 @@ def test_insert_performance(strategy, count=500):
     }
     
     print_results(results)
-    return results
+    return results, numbers
 
 def print_results(results):
     """Print formatted test results"""
@@ -90,22 +114,16 @@ def print_results(results):
     print(f"   🚀 Speed: {results['clients_per_second']:.2f} clients/second")
     print(f"   📊 Success rate: {results['success_rate']:.1f}%")
 
-def show_client_number_distribution():
-    """Show how client numbers are distributed"""
+def show_client_number_distribution(sequential_numbers, reversed_numbers):
+    """Show how client numbers are distributed
+
+    Uses the numbers generated by the benchmark run itself, so no extra
+    queries against the (unindexed) client_name column are needed.
+    """
     print("\n📊 Client Number Distribution Analysis:")
     
-    # Get sample of sequential numbers
-    sequential_clients = Client.objects.filter(
-        first_name='TEST_SEQUENTIAL'
-    ).values_list('client_number', flat=True)[:10]
-    
-    # Get sample of reversed numbers  
-    reversed_clients = Client.objects.filter(
-        first_name='TEST_REVERSED'
-    ).values_list('client_number', flat=True)[:10]
-    
-    print(f"\n   Sequential samples: {list(sequential_clients)}")
-    print(f"   Reversed samples:   {list(reversed_clients)}")
+    print(f"\n   Sequential samples: {sequential_numbers}")
+    print(f"   Reversed samples:   {reversed_numbers}")
     
     # Show index distribution concept
     print(f"\n   Index Distribution Concept:")
@@ -132,16 +150,16 @@ def main():
     results = {}
     
     # Test 1: Sequential numbering
-    results['sequential'] = test_insert_performance('sequential', test_count)
+    results['sequential'], sequential_numbers = test_insert_performance('sequential', test_count)
     
     # Small delay between tests
     time.sleep(1)
     
     # Test 2: Reversed numbering
-    results['reversed'] = test_insert_performance('reversed', test_count)
+    results['reversed'], reversed_numbers = test_insert_performance('reversed', test_count)
     
     # Show distribution analysis
-    show_client_number_distribution()
+    show_client_number_distribution(sequential_numbers[:10], reversed_numbers[:10])
     
     # Compare results
     print("\n" + "="*60)
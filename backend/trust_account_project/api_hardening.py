@@ -6,27 +6,446 @@ Provides comprehensive security for REST API endpoints
 import time
 import json
 import logging
-import hashlib
 import hmac
-from datetime import datetime, timedelta
+import ipaddress
+import secrets
 from django.conf import settings
 from django.core.exceptions import PermissionDenied, SuspiciousOperation
 from django.http import JsonResponse
 from django.core.cache import cache
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework.permissions import BasePermission
+from django.middleware.csrf import InvalidTokenFormat, _check_token_format, _does_token_match
+from rest_framework.permissions import BasePermission, SAFE_METHODS
 from rest_framework.throttling import BaseThrottle
 from rest_framework.exceptions import Throttled
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
-from functools import wraps
+from functools import lru_cache, wraps
+from itertools import chain
 import re
 from trust_account_project.validators import SQLInjectionValidator  # SECURITY FIX M3
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# API security configuration
+API_PREFIXES = ('/api/', '/ajax/')
+
+SENSITIVE_ENDPOINTS = [
+    r'/api/v1/transactions/',
+    r'/api/v1/bank-accounts/',
+    r'/api/v1/settlements/',
+]
+
+# Endpoints exempt from strict content-type validation
+EXEMPT_ENDPOINTS = [
+    r'/api/auth/login/?$',
+    r'/api/auth/logout/?$',  # Logout doesn't need strict validation
+    r'/api/auth/check/?$',
+    r'/api/health/',
+    r'/api/v1/imports/pending/?$',  # Import approval - get pending imports
+    r'/api/v1/imports/\d+/approve/?$',  # Import approval - approve import
+    r'/api/v1/imports/\d+/reject/?$',  # Import approval - reject import
+]
+
+
+def _compile_alternation(patterns):
+    """Combine patterns into one regex so a single match call checks them all"""
+    return re.compile('|'.join(f'(?:{p})' for p in patterns))
+
+
+# Compiled once at import instead of looping re.match() on every request
+SENSITIVE_ENDPOINT_RE = _compile_alternation(SENSITIVE_ENDPOINTS)
+EXEMPT_ENDPOINT_RE = _compile_alternation(EXEMPT_ENDPOINTS)
+
+
+# Networks whose X-Forwarded-For header is trusted; empty trusts every peer
+TRUSTED_PROXY_NETWORKS = tuple(
+    ipaddress.ip_network(network, strict=False)
+    for network in getattr(settings, 'TRUSTED_PROXIES', ())
+)
+
+
+@lru_cache(maxsize=1024)
+def is_trusted_proxy(remote_addr):
+    """Check whether REMOTE_ADDR belongs to a trusted proxy network (cached per address)"""
+    if not TRUSTED_PROXY_NETWORKS:
+        return True
+    try:
+        address = ipaddress.ip_address(remote_addr)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXY_NETWORKS)
+
+
+def get_client_ip(request):
+    """
+    Get client IP address, parsed once per request
+
+    The result is cached on request._client_ip, so the middleware, throttle
+    and authentication classes share a single X-Forwarded-For parse.
+    X-Forwarded-For is only honoured when the peer is a TRUSTED_PROXIES
+    address (or no proxies are configured).
+    """
+    ip = getattr(request, '_client_ip', None)
+    if ip is None:
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for and is_trusted_proxy(request.META.get('REMOTE_ADDR', '')):
+            ip = x_forwarded_for.partition(',')[0].strip()
+        else:
+            ip = request.META.get('REMOTE_ADDR')
+        ip = request._client_ip = ip or 'unknown'
+    return ip
+
+
+class CacheBatch:
+    """
+    Queue cache operations and send them in one round-trip
+
+    On the Redis cache the queued commands go into a single non-transactional
+    pipeline; other cache backends run each operation through the generic
+    cache API when the batch is executed. execute() returns one result per
+    queued operation, in order.
+    """
+
+    def __init__(self):
+        try:
+            from django_redis import get_redis_connection
+            self.pipe = get_redis_connection('default').pipeline(transaction=False)
+        except (ImportError, NotImplementedError):
+            self.pipe = None
+        # Per operation: a fallback callable (no Redis), or the number of
+        # pipeline replies it produced, which of them is its result and an
+        # optional converter for that reply
+        self.operations = []
+
+    def incr(self, key, timeout):
+        """Queue an atomic counter increment; the result is the new count"""
+        if self.pipe is None:
+            self.operations.append(lambda: _increment_cache_counter(key, timeout))
+            return
+        redis_key = cache.make_key(key)
+        self.pipe.incr(redis_key)
+        self.pipe.expire(redis_key, timeout, nx=True)  # Only set expiry when the counter is new
+        self.operations.append((2, 0, None))
+
+    def get(self, key, default=None):
+        """Queue a cache read; the result is the stored value or default"""
+        if self.pipe is None:
+            self.operations.append(lambda: cache.get(key, default))
+            return
+        self.pipe.get(cache.make_key(key))
+        self.operations.append((1, 0, lambda value: default if value is None else cache.client.decode(value)))
+
+    def add_to_set(self, key, members, timeout):
+        """Queue adding members to a set; the result is its number of distinct members"""
+        members = list(members)
+        if self.pipe is None:
+            self.operations.append(lambda: _add_to_cached_list_set(key, members, timeout))
+            return
+        redis_key = cache.make_key(key)
+        if members:
+            self.pipe.sadd(redis_key, *members)
+        self.pipe.expire(redis_key, timeout)
+        self.pipe.scard(redis_key)
+        self.operations.append((3 if members else 2, -1, None))
+
+    def append_to_capped_list(self, key, value, max_length, timeout):
+        """Queue appending value to a list capped at max_length entries"""
+        if self.pipe is None:
+            self.operations.append(lambda: _append_to_cached_list(key, value, max_length, timeout))
+            return
+        redis_key = cache.make_key(key)
+        self.pipe.rpush(redis_key, cache.client.encode(value))
+        self.pipe.ltrim(redis_key, -max_length, -1)
+        self.pipe.expire(redis_key, timeout)
+        self.operations.append((3, None, None))
+
+    def execute(self):
+        """Run the queued operations and return their results"""
+        if self.pipe is None:
+            return [operation() for operation in self.operations]
+
+        replies = self.pipe.execute()
+        results = []
+        position = 0
+        for reply_count, result_index, convert in self.operations:
+            result = None
+            if result_index is not None:
+                result = replies[position:position + reply_count][result_index]
+                if convert is not None:
+                    result = convert(result)
+            results.append(result)
+            position += reply_count
+        return results
+
+
+def increment_rate_counters(keys, timeout):
+    """
+    Atomically increment several rate-limit counters and return the new counts
+
+    Each counter is created with ``timeout`` on first use and keeps that
+    expiry; pass a list to give each key its own timeout. On the Redis cache
+    every INCR/EXPIRE for all keys is sent in one pipelined round-trip; other
+    cache backends fall back to cache.incr per key.
+    """
+    timeouts = timeout if isinstance(timeout, (list, tuple)) else [timeout] * len(keys)
+    batch = CacheBatch()
+    for key, timeout in zip(keys, timeouts):
+        batch.incr(key, timeout)
+    return batch.execute()
+
+
+def increment_rate_counter(key, timeout):
+    """Atomically increment a single rate-limit counter and return the new count"""
+    return increment_rate_counters([key], timeout)[0]
+
+
+# For each window KEYS[i] (window ARGV[2+2i], limit ARGV[3+2i]): prune, count
+# and (only while under the limit) ZADD + EXPIRE, server-side as one atomic
+# step. A negative limit records unconditionally. Rejected events are
+# neither stored nor extend the window, so a throttled client that keeps
+# retrying still ages out and the set never grows past the limit. Keys after
+# the ARGV[3] windows are SET to the (value, timeout) pairs that follow.
+_SLIDING_WINDOW_SCRIPT = """
+local now, member, windows = tonumber(ARGV[1]), ARGV[2], tonumber(ARGV[3])
+local results = {}
+for i = 1, windows do
+    local window, limit = tonumber(ARGV[2 + 2 * i]), tonumber(ARGV[3 + 2 * i])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], 0, now - window)
+    local count = redis.call('ZCARD', KEYS[i])
+    if limit >= 0 and count >= limit then
+        results[i] = {count, 0}
+    else
+        redis.call('ZADD', KEYS[i], ARGV[1], member)
+        redis.call('EXPIRE', KEYS[i], window)
+        results[i] = {count + 1, 1}
+    end
+end
+for i = windows + 1, #KEYS do
+    local arg = 2 + 2 * i
+    redis.call('SET', KEYS[i], ARGV[arg], 'EX', ARGV[arg + 1])
+end
+return results
+"""
+
+# redis-py Script for _SLIDING_WINDOW_SCRIPT, created on first use. Calling
+# it directly sends a single EVALSHA (loading the script only on NOSCRIPT);
+# running it in a pipeline would add a SCRIPT EXISTS round-trip per execute.
+_sliding_window_script = None
+
+
+def count_sliding_window(key, window, limit):
+    """
+    Record a request if fewer than ``limit`` were made in the last ``window`` seconds
+
+    Returns (count, allowed). On Redis each request is a sorted-set member
+    scored by its timestamp, so the quota covers a true rolling window with
+    no 2x burst at bucket boundaries. Other cache backends fall back to a
+    fixed-window counter.
+    """
+    return record_sliding_windows([(key, window, limit)])[0]
+
+
+def record_sliding_windows(windows, values=()):
+    """
+    Record one event in several (key, window[, limit]) sliding windows
+
+    Returns a (count, allowed) pair per window. The event is only recorded
+    in a window holding fewer than ``limit`` events (always, without a
+    limit); ``count`` includes it when it was. Optional (key, value,
+    timeout) entries in ``values`` are cache.set alongside. On Redis
+    everything is one EVALSHA round-trip.
+    """
+    global _sliding_window_script
+    windows = [(key, window, limit[0] if limit else None) for key, window, *limit in windows]
+    try:
+        from django_redis import get_redis_connection
+        client = get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        for key, value, timeout in values:
+            cache.set(key, value, timeout)
+        results = []
+        for key, window, limit in windows:
+            count = cache.get(key, 0)
+            if limit is not None and count >= limit:
+                results.append((count, False))
+            else:
+                results.append((increment_rate_counter(key, window), True))
+        return results
+
+    now = time.time()
+    member = f"{now}:{secrets.token_hex(4)}"  # Unique even for same-timestamp requests
+    if _sliding_window_script is None:
+        _sliding_window_script = client.register_script(_SLIDING_WINDOW_SCRIPT)
+    keys = [cache.make_key(key) for key, _, _ in windows]
+    args = [now, member, len(windows)]
+    for key, window, limit in windows:
+        args += [window, -1 if limit is None else limit]
+    for key, value, timeout in values:
+        # Encode with the cache's serializer so cache.get() reads it back
+        keys.append(cache.make_key(key))
+        args += [cache.client.encode(value), timeout]
+    results = _sliding_window_script(keys=keys, args=args, client=client)
+    return [(count, bool(allowed)) for count, allowed in results]
+
+
+def get_sliding_window_count(key, window):
+    """Return how many events a sliding window holds, without recording one"""
+    try:
+        from django_redis import get_redis_connection
+        client = get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return cache.get(key, 0)
+
+    # Read-only: count the entries inside the window and leave pruning to
+    # the next write (record_sliding_windows) and the key's TTL
+    return client.zcount(cache.make_key(key), f'({time.time() - window}', '+inf')
+
+
+def add_to_set(key, members, timeout):
+    """
+    Add members to a cached set and return how many distinct members it holds
+
+    On Redis this is a native SET (SADD/EXPIRE/SCARD in one pipelined
+    round-trip), so only the new members cross the network. Other cache
+    backends store the set as a list and rewrite it. ``key`` must not be one
+    that cache.set has written to: Redis rejects SADD on a string value.
+    """
+    batch = CacheBatch()
+    batch.add_to_set(key, members, timeout)
+    return batch.execute()[0]
+
+
+def append_to_capped_list(key, value, max_length, timeout):
+    """
+    Append value to a cached list, keeping only the newest max_length entries
+
+    On Redis this is a native LIST (RPUSH/LTRIM/EXPIRE in one pipelined
+    round-trip), so only the new entry is serialized and sent. Other cache
+    backends rewrite the whole list. As with add_to_set, ``key`` must not
+    be one that cache.set has written to.
+    """
+    batch = CacheBatch()
+    batch.append_to_capped_list(key, value, max_length, timeout)
+    batch.execute()
+
+
+def get_cached_list(key):
+    """Return the entries of a list written by append_to_capped_list, oldest first"""
+    try:
+        from django_redis import get_redis_connection
+        client = get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return cache.get(key, [])
+
+    return [cache.client.decode(entry) for entry in client.lrange(cache.make_key(key), 0, -1)]
+
+
+def _add_to_cached_list_set(key, members, timeout):
+    """Add members to a set stored as a cached list (non-Redis backends)"""
+    stored = set(cache.get(key, []))
+    stored.update(members)
+    cache.set(key, list(stored), timeout)  # Lists keep the cache serializer happy
+    return len(stored)
+
+
+def _append_to_cached_list(key, value, max_length, timeout):
+    """Append to a capped list stored as a cached list (non-Redis backends)"""
+    entries = cache.get(key, [])
+    entries.append(value)
+    cache.set(key, entries[-max_length:], timeout)
+
+
+def _increment_cache_counter(key, timeout):
+    """Increment a counter through the generic cache API (non-Redis backends)"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key does not exist yet - create it, unless another request beat us to it
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def csrf_header_is_valid(request):
+    """
+    Check the X-CSRFToken header against the CSRF cookie secret
+
+    Uses Django's own token matching (which unmasks masked tokens and
+    compares with hmac.compare_digest) rather than just testing that the
+    header is present. A successful check is recorded on request._csrf_ok,
+    so repeated checks in the same request - including the token check in
+    csrf_protection.CachedCsrfViewMiddleware - are skipped.
+    """
+    if getattr(request, '_csrf_ok', False):
+        return True
+
+    csrf_token = request.META.get('HTTP_X_CSRFTOKEN')
+    csrf_secret = request.META.get('CSRF_COOKIE')  # Set by CsrfViewMiddleware.process_request
+    if not csrf_token or not csrf_secret:
+        return False
+    try:
+        _check_token_format(csrf_token)
+    except InvalidTokenFormat:
+        return False
+    if not _does_token_match(csrf_token, csrf_secret):
+        return False
+
+    request._csrf_ok = True
+    return True
+
+
+def _reject_constant(value):
+    """Reject NaN/Infinity the same way DRF's strict JSON parsing does"""
+    raise ValueError(f'Out of range float values are not JSON compliant: {value!r}')
+
+
+def get_request_json(request):
+    """
+    Parse the JSON request body once and cache it on the request
+
+    The cached value is picked up by apps.api.parsers.CachedJSONParser so
+    DRF views do not parse the same body a second time. None means the
+    body could not be parsed and the regular parser should handle it.
+    orjson is used when installed; it rejects NaN/Infinity by itself.
+    """
+    if not hasattr(request, '_cached_json'):
+        try:
+            if orjson is not None:
+                request._cached_json = orjson.loads(request.body)
+            else:
+                request._cached_json = json.loads(request.body, parse_constant=_reject_constant)
+        except Exception:
+            request._cached_json = None
+    return request._cached_json
+
+
+def iter_json_strings(data, key='body'):
+    """
+    Yield (key, value) for every string value in parsed JSON, however nested
+
+    Values are labelled with the nearest object key; the keys themselves are
+    not yielded. Each value is checked on its own, so patterns can't match
+    across field boundaries and JSON escapes are already decoded.
+    """
+    stack = [(key, data)]
+    while stack:
+        key, value = stack.pop()
+        if isinstance(value, str):
+            yield key, value
+        elif isinstance(value, dict):
+            stack.extend(value.items())
+        elif isinstance(value, list):
+            stack.extend((key, item) for item in value)
+
+
 class APISecurityMiddleware(MiddlewareMixin):
     """
     Comprehensive API security middleware
@@ -34,56 +453,32 @@ class APISecurityMiddleware(MiddlewareMixin):
     
     def __init__(self, get_response):
         self.get_response = get_response
-        # API security configuration
-        self.api_prefixes = ['/api/', '/ajax/']
-        self.sensitive_endpoints = [
-            r'/api/v1/transactions/',
-            r'/api/v1/bank-accounts/',
-            r'/api/v1/settlements/',
-        ]
-        # Endpoints exempt from strict content-type validation
-        self.exempt_endpoints = [
-            r'/api/auth/login/?$',
-            r'/api/auth/logout/?$',  # Logout doesn't need strict validation
-            r'/api/auth/check/?$',
-            r'/api/health/',
-            r'/api/v1/imports/pending/?$',  # Import approval - get pending imports
-            r'/api/v1/imports/\d+/approve/?$',  # Import approval - approve import
-            r'/api/v1/imports/\d+/reject/?$',  # Import approval - reject import
-        ]
         self.max_request_size = 10 * 1024 * 1024  # 10MB
         self.max_params_count = 100
+        # Validators run in order: (check, error message, status code, also applies to exempt endpoints)
+        self.validators = (
+            (self.validate_request_size, 'Request size exceeds limit', 413, True),
+            (self.validate_parameter_count, 'Too many parameters', 400, False),
+            (self.validate_content_type, 'Invalid content type', 400, False),
+            (self.validate_rate_limits, 'Rate limit exceeded', 429, True),  # Per IP/user
+            (self.validate_sql_injection, 'Invalid request pattern detected', 400, True),
+        )
         super().__init__(get_response)
     
     def process_request(self, request):
         """Process API requests with enhanced security"""
 
-        # SECURITY FIX: Pass request.path string, not request object
-        if not self.is_api_request(request.path):
+        # Cheapest check first - non-API paths leave with a single startswith()
+        path = request.path
+        if not path.startswith(API_PREFIXES):
             return None
 
         # Check if endpoint is exempt from strict validation
-        is_exempt = self.is_exempt_endpoint(request.path)
-
-        # Size validation
-        if not self.validate_request_size(request):
-            return self.security_response('Request size exceeds limit', 413)
-
-        # Parameter count validation (skip for exempt endpoints)
-        if not is_exempt and not self.validate_parameter_count(request):
-            return self.security_response('Too many parameters', 400)
-
-        # Content type validation (skip for exempt endpoints)
-        if not is_exempt and not self.validate_content_type(request):
-            return self.security_response('Invalid content type', 400)
+        is_exempt = self.is_exempt_endpoint(path)
 
-        # Rate limit validation per IP/user
-        if not self.validate_rate_limits(request):
-            return self.security_response('Rate limit exceeded', 429)
-
-        # SQL injection pattern detection
-        if not self.validate_sql_injection(request):
-            return self.security_response('Invalid request pattern detected', 400)
+        for validator, message, status_code, applies_to_exempt in self.validators:
+            if (applies_to_exempt or not is_exempt) and not validator(request):
+                return self.security_response(message, status_code)
 
         # Sensitive endpoint validation
         if self.is_sensitive_endpoint(request) and not self.validate_sensitive_access(request):
@@ -93,14 +488,11 @@ class APISecurityMiddleware(MiddlewareMixin):
 
     def is_exempt_endpoint(self, path):
         """Check if endpoint is exempt from strict validation"""
-        for pattern in self.exempt_endpoints:
-            if re.match(pattern, path):
-                return True
-        return False
+        return EXEMPT_ENDPOINT_RE.match(path) is not None
     
     def is_api_request(self, path):
         """Check if request is to API endpoint"""
-        return any(path.startswith(prefix) for prefix in self.api_prefixes)
+        return path.startswith(API_PREFIXES)
     
     def validate_request_size(self, request):
         """Validate request size limits"""
@@ -136,24 +528,21 @@ class APISecurityMiddleware(MiddlewareMixin):
         """Validate rate limits per IP and user"""
         client_ip = self.get_client_ip(request)
         
+        # IP- and user-based counters are incremented together in one round-trip
+        keys = [f"api_rate_ip_{client_ip}"]
+        if request.user.is_authenticated:
+            keys.append(f"api_rate_user_{request.user.id}")
+        counts = increment_rate_counters(keys, 3600)  # 1 hour window
+        
         # IP-based rate limiting
-        ip_key = f"api_rate_ip_{client_ip}"
-        ip_requests = cache.get(ip_key, 0)
-        if ip_requests > 1000:  # 1000 requests per hour per IP
+        if counts[0] > 1000:  # 1000 requests per hour per IP
             logger.warning(f"SECURITY: IP rate limit exceeded: {client_ip}")
             return False
         
-        cache.set(ip_key, ip_requests + 1, 3600)  # 1 hour timeout
-        
         # User-based rate limiting
-        if request.user.is_authenticated:
-            user_key = f"api_rate_user_{request.user.id}"
-            user_requests = cache.get(user_key, 0)
-            if user_requests > 2000:  # 2000 requests per hour per user
-                logger.warning(f"SECURITY: User rate limit exceeded: {request.user}")
-                return False
-            
-            cache.set(user_key, user_requests + 1, 3600)
+        if len(counts) > 1 and counts[1] > 2000:  # 2000 requests per hour per user
+            logger.warning(f"SECURITY: User rate limit exceeded: {request.user}")
+            return False
         
         return True
     
@@ -162,40 +551,40 @@ class APISecurityMiddleware(MiddlewareMixin):
         Detect potential SQL injection patterns
         SECURITY FIX M3: Now uses centralized SQLInjectionValidator
         """
-        # Check all input sources
-        all_params = {}
-        all_params.update(request.GET.dict())
-        all_params.update(request.POST.dict())
+        # Read-only requests without a query string carry no user input
+        if request.method in SAFE_METHODS and not request.GET:
+            return True
+
+        # Check all input sources (iterated in place, no intermediate dict copies)
+        all_params = chain(request.GET.lists(), request.POST.lists())
 
         # Check request body for JSON
         # BUG FIX: Skip body access for file uploads (multipart/form-data)
         # Check content_type BEFORE accessing body (hasattr triggers access!)
         content_type = getattr(request, 'content_type', '')
-        if content_type.startswith('application/json'):
-            try:
-                body_data = json.loads(request.body.decode('utf-8'))
-                if isinstance(body_data, dict):
-                    all_params.update(body_data)
-            except:
-                pass
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if content_type.startswith('application/json') and content_length > 0:
+            # Every decoded string value is scanned on its own, never the raw
+            # body: patterns would match across fields and keys, and JSON
+            # escapes (\" or \u0027) would hide quote-based payloads
+            body_data = get_request_json(request)
+            if body_data is not None:
+                all_params = chain(all_params, ((key, [value]) for key, value in iter_json_strings(body_data)))
 
         # Use centralized validator (13 patterns, pre-compiled regex)
-        for key, value in all_params.items():
-            if isinstance(value, str):
-                is_valid, violations = SQLInjectionValidator.validate(value, field_name=f"param:{key}")
-                if not is_valid:
-                    logger.error(f"SECURITY: SQL injection detected from {self.get_client_ip(request)} in {key}: {violations}")
-                    return False
+        for key, values in all_params:
+            for value in values:
+                if isinstance(value, str):
+                    is_valid, violations = SQLInjectionValidator.validate(value, field_name=f"param:{key}")
+                    if not is_valid:
+                        logger.error(f"SECURITY: SQL injection detected from {self.get_client_ip(request)} in {key}: {violations}")
+                        return False
 
         return True
     
     def is_sensitive_endpoint(self, request):
         """Check if endpoint is sensitive"""
-        path = request.path
-        for pattern in self.sensitive_endpoints:
-            if re.match(pattern, path):
-                return True
-        return False
+        return SENSITIVE_ENDPOINT_RE.match(request.path) is not None
     
     def validate_sensitive_access(self, request):
         """Additional validation for sensitive endpoints"""
@@ -211,15 +600,14 @@ class APISecurityMiddleware(MiddlewareMixin):
         #     logger.warning(f"SECURITY: Missing X-Requested-With header from {self.get_client_ip(request)}")
         #     return False
 
-        # For non-GET requests, check for CSRF token
+        # For non-GET requests, validate the CSRF token
         if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
-            csrf_token = request.META.get('HTTP_X_CSRFTOKEN')
-            if not csrf_token:
-                logger.warning(f"SECURITY: Missing X-CSRFToken header for {request.method} from {self.get_client_ip(request)}")
+            if not csrf_header_is_valid(request):
+                logger.warning(f"SECURITY: Missing or invalid X-CSRFToken header for {request.method} from {self.get_client_ip(request)}")
                 return False
 
         # Time-based validation (business hours check - optional)
-        current_hour = datetime.now().hour
+        current_hour = time.localtime().tm_hour
         if current_hour < 6 or current_hour > 22:  # Outside 6 AM - 10 PM
             # Allow but log suspicious activity
             logger.info(f"SECURITY: After-hours API access by {request.user} from {self.get_client_ip(request)}")
@@ -228,12 +616,7 @@ class APISecurityMiddleware(MiddlewareMixin):
     
     def get_client_ip(self, request):
         """Get client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
+        return get_client_ip(request)
     
     def security_response(self, message, status_code):
         """Create security response"""
@@ -322,17 +705,15 @@ class APIRateLimitThrottle(BaseThrottle):
         # Create cache key
         cache_key = self.get_cache_key(request, rate_key)
         
-        # Get current request count
-        current_requests = cache.get(cache_key, 0)
+        # Count this request atomically over a rolling hour; rejected
+        # requests are not counted
+        _, allowed = count_sliding_window(cache_key, 3600, rate_limit)
         
-        if current_requests >= rate_limit:
+        if not allowed:
             # Rate limit exceeded
             self.wait_time = 3600  # 1 hour wait time
             return False
         
-        # Increment counter
-        cache.set(cache_key, current_requests + 1, 3600)  # 1 hour timeout
-        
         return True
     
     def wait(self):
@@ -350,23 +731,11 @@ class APIRateLimitThrottle(BaseThrottle):
     
     def is_sensitive_endpoint(self, request):
         """Check if endpoint is sensitive"""
-        sensitive_patterns = [
-            r'/api/v1/transactions/',
-            r'/api/v1/bank-accounts/',
-            r'/api/v1/settlements/',
-        ]
-        
-        path = request.path
-        return any(re.match(pattern, path) for pattern in sensitive_patterns)
+        return SENSITIVE_ENDPOINT_RE.match(request.path) is not None
     
     def get_client_ip(self, request):
         """Get client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
+        return get_client_ip(request)
 
 
 # API Security Decorators
@@ -380,8 +749,7 @@ def api_security_required(view_func):
         
         # Check for required headers
         if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
-            csrf_token = request.META.get('HTTP_X_CSRFTOKEN')
-            if not csrf_token:
+            if not csrf_header_is_valid(request):
                 return JsonResponse({'error': 'CSRF token required'}, status=403)
         
         # Log API access
@@ -407,7 +775,7 @@ def sensitive_api_endpoint(view_func):
             return JsonResponse({'error': 'Administrative privileges required'}, status=403)
         
         # Validate request timing
-        current_hour = datetime.now().hour
+        current_hour = time.localtime().tm_hour
         if current_hour < 6 or current_hour > 22:
             logger.warning(f"SECURITY: Sensitive API access outside business hours by {request.user}")
         
@@ -441,11 +809,16 @@ class SecureSessionAuthentication(SessionAuthentication):
             user, auth = user_auth
             
             # Additional session security checks
-            if hasattr(request, 'session'):
+            session = getattr(request, 'session', None)
+            if session is not None:
+                # Read every security marker once up front
+                session_start = session.get('_session_init_timestamp_')
+                session_ip = session.get('_session_ip')
+                session_ua = session.get('_session_user_agent')
+
                 # Check session age
-                session_start = request.session.get('_session_init_timestamp_')
                 if not session_start:
-                    request.session['_session_init_timestamp_'] = time.time()
+                    session['_session_init_timestamp_'] = time.time()
                 else:
                     session_age = time.time() - session_start
                     if session_age > 28800:  # 8 hours
@@ -453,22 +826,22 @@ class SecureSessionAuthentication(SessionAuthentication):
                         return None
                 
                 # Check for session hijacking indicators
-                if not self.validate_session_security(request, user):
+                if not self.validate_session_security(request, user, session_ip, session_ua):
                     return None
             
             return user_auth
         
         return None
     
-    def validate_session_security(self, request, user):
-        """Validate session security indicators"""
-        
+    def validate_session_security(self, request, user, session_ip, session_ua):
+        """Validate session security indicators against the stored session values"""
+        session = request.session
+
         # Check IP consistency (basic check)
         current_ip = self.get_client_ip(request)
-        session_ip = request.session.get('_session_ip')
         
         if not session_ip:
-            request.session['_session_ip'] = current_ip
+            session['_session_ip'] = current_ip
         elif session_ip != current_ip:
             # IP changed - potential session hijacking
             logger.warning(f"SECURITY: Session IP change for {user}: {session_ip} -> {current_ip}")
@@ -477,10 +850,9 @@ class SecureSessionAuthentication(SessionAuthentication):
         
         # Check user agent consistency
         current_ua = request.META.get('HTTP_USER_AGENT', '')
-        session_ua = request.session.get('_session_user_agent')
         
         if not session_ua:
-            request.session['_session_user_agent'] = current_ua
+            session['_session_user_agent'] = current_ua
         elif session_ua != current_ua:
             logger.warning(f"SECURITY: Session User-Agent change for {user}")
         
@@ -488,9 +860,4 @@ class SecureSessionAuthentication(SessionAuthentication):
     
     def get_client_ip(self, request):
         """Get client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
\ No newline at end of file
+        return get_client_ip(request)
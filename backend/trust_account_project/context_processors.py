@@ -3,6 +3,9 @@ from apps.settings.models import LawFirm
 
 def law_firm_context(request):
     """Add law firm information to all template contexts"""
+    # Memoize on the request so multiple renders in one request share the lookup
+    if not hasattr(request, '_law_firm'):
+        request._law_firm = LawFirm.get_cached_active_firm()
     return {
-        'global_law_firm': LawFirm.get_active_firm()
+        'global_law_firm': request._law_firm
     }
\ No newline at end of file
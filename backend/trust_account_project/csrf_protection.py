@@ -3,23 +3,41 @@ TAMS Advanced CSRF Protection System
 Provides comprehensive view-level CSRF enforcement beyond Django's default protection
 """
 
-import hashlib
 import hmac
 import time
 import json
 import logging
+from decimal import Decimal, InvalidOperation
 from django.conf import settings
 from django.core.exceptions import PermissionDenied, SuspiciousOperation
 from django.http import JsonResponse, HttpResponseForbidden
-from django.middleware.csrf import get_token
+from django.middleware.csrf import CsrfViewMiddleware, get_token
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_protect, ensure_csrf_cookie
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth.mixins import LoginRequiredMixin
 import re
+from trust_account_project.api_hardening import get_client_ip
 
 logger = logging.getLogger(__name__)
 
+
+class CachedCsrfViewMiddleware(CsrfViewMiddleware):
+    """
+    Django's CSRF middleware that trusts an earlier token check in the same request
+
+    When api_hardening.csrf_header_is_valid has already matched the
+    X-CSRFToken header against the CSRF cookie (request._csrf_ok), the
+    identical token comparison is skipped. Origin and Referer checks
+    still run as normal.
+    """
+
+    def _check_token(self, request):
+        if getattr(request, '_csrf_ok', False):
+            return
+        super()._check_token(request)
+
+
 class AdvancedCSRFProtectionMiddleware(MiddlewareMixin):
     """
     Advanced CSRF protection middleware with enhanced validation
@@ -79,13 +97,13 @@ class AdvancedCSRFProtectionMiddleware(MiddlewareMixin):
             csrf_token = request.POST.get('csrfmiddlewaretoken') or request.META.get('HTTP_X_CSRFTOKEN')
         
         if not csrf_token:
-            logger.warning(f"SECURITY: Missing CSRF token from {self.get_client_ip(request)} for {request.path}")
+            logger.warning("SECURITY: Missing CSRF token from %s for %s", self.get_client_ip(request), request.path)
             return False
         
         # Basic CSRF validation - let Django's middleware handle the complex validation
         # This is an additional layer, not a replacement
         if len(csrf_token) < 32:  # CSRF tokens should be at least 32 characters
-            logger.error(f"SECURITY: Invalid CSRF token format from {self.get_client_ip(request)}")
+            logger.error("SECURITY: Invalid CSRF token format from %s", self.get_client_ip(request))
             return False
         
         # Additional validation for API endpoints
@@ -103,7 +121,7 @@ class AdvancedCSRFProtectionMiddleware(MiddlewareMixin):
             # For API calls, require custom header for CSRF protection
             csrf_header = request.META.get('HTTP_X_CSRFTOKEN')
             if not csrf_header or csrf_header != csrf_token:
-                logger.warning(f"SECURITY: API CSRF validation failed from {self.get_client_ip(request)}")
+                logger.warning("SECURITY: API CSRF validation failed from %s", self.get_client_ip(request))
                 return False
         
         return True
@@ -126,46 +144,46 @@ class AdvancedCSRFProtectionMiddleware(MiddlewareMixin):
     def validate_sensitive_operation(self, request):
         """Additional validation for sensitive operations"""
         
+        path = request.path.lower()
+        
         # Require confirmation parameter for delete operations
-        if 'delete' in request.path.lower():
+        if 'delete' in path:
             confirm = request.POST.get('confirm_delete') or request.GET.get('confirm_delete')
             if confirm != 'yes':
-                logger.warning(f"SECURITY: Delete operation without confirmation from {self.get_client_ip(request)}")
+                logger.warning("SECURITY: Delete operation without confirmation from %s", self.get_client_ip(request))
                 return False
         
         # Validate transaction amounts
-        if 'transaction' in request.path.lower():
+        if 'transaction' in path:
             amount = request.POST.get('amount')
             if amount:
+                # Parsed as Decimal (exact for money, unlike float)
                 try:
-                    amount_val = float(amount)
-                    if amount_val < 0:
-                        logger.warning(f"SECURITY: Negative transaction amount attempted from {self.get_client_ip(request)}")
-                        return False
-                    if amount_val > 1000000:  # $1M limit
-                        logger.warning(f"SECURITY: Excessive transaction amount attempted: ${amount_val} from {self.get_client_ip(request)}")
-                        return False
-                except (ValueError, TypeError):
-                    logger.warning(f"SECURITY: Invalid transaction amount format from {self.get_client_ip(request)}")
+                    amount_val = Decimal(amount)
+                except (InvalidOperation, ValueError, TypeError):
+                    amount_val = None
+                if amount_val is None or not amount_val.is_finite():
+                    logger.warning("SECURITY: Invalid transaction amount format from %s", self.get_client_ip(request))
+                    return False
+                if amount_val < 0:
+                    logger.warning("SECURITY: Negative transaction amount attempted from %s", self.get_client_ip(request))
+                    return False
+                if amount_val > 1000000:  # $1M limit
+                    logger.warning("SECURITY: Excessive transaction amount attempted: $%s from %s", amount_val, self.get_client_ip(request))
                     return False
         
         return True
     
     def get_client_ip(self, request):
         """Get client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
+        return get_client_ip(request)
     
     def csrf_failure(self, request, is_api_endpoint):
         """Handle CSRF validation failure"""
         client_ip = self.get_client_ip(request)
         
         # Log security incident
-        logger.error(f"SECURITY: CSRF protection triggered - blocked request from {client_ip} to {request.path}")
+        logger.error("SECURITY: CSRF protection triggered - blocked request from %s to %s", client_ip, request.path)
         
         if is_api_endpoint or request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -183,7 +201,7 @@ class AdvancedCSRFProtectionMiddleware(MiddlewareMixin):
         """Handle sensitive operation validation failure"""
         client_ip = self.get_client_ip(request)
         
-        logger.error(f"SECURITY: Sensitive operation validation failed from {client_ip} to {request.path}")
+        logger.error("SECURITY: Sensitive operation validation failed from %s to %s", client_ip, request.path)
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -205,16 +223,18 @@ class EnhancedCSRFMixin:
     # Override these in subclasses for specific requirements
     require_confirmation_delete = True
     max_transaction_amount = 1000000.00
-    sensitive_fields = ['amount', 'password', 'ssn', 'account_number']
+    sensitive_fields = frozenset(['amount', 'password', 'ssn', 'account_number'])
     
     def dispatch(self, request, *args, **kwargs):
         """Enhanced dispatch with CSRF validation"""
         
         # Ensure CSRF token is present
         if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
-            csrf_token = get_token(request)
+            # The secret from the CSRF cookie is enough for a presence check;
+            # only mint (and mask) a new token when there is none yet
+            csrf_token = request.META.get('CSRF_COOKIE') or get_token(request)
             if not csrf_token:
-                logger.error(f"SECURITY: No CSRF token available for {request.path}")
+                logger.error("SECURITY: No CSRF token available for %s", request.path)
                 return JsonResponse({'error': 'CSRF token required'}, status=403)
         
         return super().dispatch(request, *args, **kwargs)
@@ -238,38 +258,39 @@ class EnhancedCSRFMixin:
         self.validate_sensitive_data(form_data)
         
         # Log successful form submission
-        logger.info(f"SECURITY: Form submission validated for {self.request.user} from {self.get_client_ip()}")
+        logger.info("SECURITY: Form submission validated for %s from %s", self.request.user, self.get_client_ip())
         
         return super().form_valid(form)
     
     def validate_sensitive_data(self, data):
         """Validate sensitive data in forms"""
         
-        for field_name, value in data.items():
-            if field_name in self.sensitive_fields and value:
+        # Only visit the sensitive fields present in this form (C-level set
+        # intersection) instead of scanning every cleaned field
+        for field_name in data.keys() & self.sensitive_fields:
+            value = data[field_name]
+            if value:
                 # Additional validation for sensitive fields
                 if field_name == 'amount':
+                    # Cleaned amounts are already Decimal; only parse other values
                     try:
-                        amount_val = float(str(value))
-                        if amount_val > self.max_transaction_amount:
-                            raise SuspiciousOperation(f"Transaction amount exceeds limit: ${amount_val}")
-                    except (ValueError, TypeError):
+                        amount_val = value if isinstance(value, Decimal) else Decimal(str(value))
+                    except (InvalidOperation, ValueError, TypeError):
                         raise SuspiciousOperation(f"Invalid amount format: {value}")
+                    if not amount_val.is_finite():
+                        raise SuspiciousOperation(f"Invalid amount format: {value}")
+                    if amount_val > Decimal(str(self.max_transaction_amount)):
+                        raise SuspiciousOperation(f"Transaction amount exceeds limit: ${amount_val}")
                 
-                elif field_name in ['ssn', 'account_number']:
+                elif field_name in ('ssn', 'account_number'):
                     # Validate format and log access
-                    logger.info(f"SECURITY: Sensitive field {field_name} accessed by {self.request.user}")
+                    logger.info("SECURITY: Sensitive field %s accessed by %s", field_name, self.request.user)
         
         return True
     
     def get_client_ip(self):
         """Get client IP address"""
-        x_forwarded_for = self.request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = self.request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
+        return get_client_ip(self.request)
 
 
 # Enhanced decorators for function-based views
@@ -278,21 +299,24 @@ def enhanced_csrf_protect(view_func):
     from django.views.decorators.csrf import csrf_protect
     from functools import wraps
     
+    # Wrap once at decoration time rather than on every request
+    protected_view = csrf_protect(view_func)
+    
     @wraps(view_func)
     def wrapped_view(request, *args, **kwargs):
         # Enhanced CSRF validation
         if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
             # Ensure token is present
-            csrf_token = get_token(request)
+            csrf_token = request.META.get('CSRF_COOKIE') or get_token(request)
             if not csrf_token:
-                logger.error(f"SECURITY: Enhanced CSRF protection - no token for {request.path}")
+                logger.error("SECURITY: Enhanced CSRF protection - no token for %s", request.path)
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     return JsonResponse({'error': 'CSRF token required'}, status=403)
                 else:
                     return HttpResponseForbidden('CSRF token required')
         
         # Apply standard CSRF protection
-        return csrf_protect(view_func)(request, *args, **kwargs)
+        return protected_view(request, *args, **kwargs)
     
     return wrapped_view
 
@@ -307,7 +331,7 @@ def api_csrf_protect(view_func):
             # For API endpoints, require both CSRF token and header
             csrf_token = request.META.get('HTTP_X_CSRFTOKEN')
             if not csrf_token:
-                logger.warning(f"SECURITY: API CSRF header missing for {request.path}")
+                logger.warning("SECURITY: API CSRF header missing for %s", request.path)
                 return JsonResponse({
                     'error': 'CSRF token required in X-CSRFToken header',
                     'code': 'csrf_required'
@@ -315,7 +339,7 @@ def api_csrf_protect(view_func):
             
             # Additional API-specific validation
             if not request.headers.get('Content-Type', '').startswith('application/'):
-                logger.warning(f"SECURITY: Invalid content type for API endpoint {request.path}")
+                logger.warning("SECURITY: Invalid content type for API endpoint %s", request.path)
                 return JsonResponse({
                     'error': 'Invalid content type for API endpoint',
                     'code': 'invalid_content_type'
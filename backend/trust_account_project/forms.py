@@ -8,6 +8,71 @@ from django.core.exceptions import ValidationError
 from django.conf import settings
 import re
 import html
+import threading
+
+# Widget attributes added to every text field of the secure forms
+SECURITY_WIDGET_ATTRS = {'data-security-validated': 'true'}
+
+# Whitespace (other than the newline itself) at the end of each line
+TRAILING_WHITESPACE_RE = re.compile(r'[^\S\n]+(?=\n|\Z)')
+
+try:
+    # Optional: Hyperscan scans all patterns at once with SIMD, reporting
+    # every pattern that matches. Not available on every platform (e.g. musl
+    # or non-x86 builds), so the combined re scan below is the fallback.
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+def combine_security_patterns(*pattern_lists):
+    """
+    Merge (compiled pattern, message) lists into one alternation regex
+
+    Each pattern keeps its own DOTALL setting through a scoped (?s:...) flag.
+    The combined regex only answers whether any pattern matches: matches
+    consume text, so one finditer() pass can hide a pattern that overlaps
+    another (the script-tag branch swallows a javascript: inside it).
+    Callers search the individual patterns once it hits. Returns the
+    combined regex and the messages list indexed by pattern position.
+    """
+    branches = []
+    messages = []
+    for pattern, message in (entry for patterns in pattern_lists for entry in patterns):
+        branches.append(f'(?s:{pattern.pattern})' if pattern.flags & re.DOTALL else f'(?:{pattern.pattern})')
+        messages.append(message)
+    return re.compile('|'.join(branches), re.IGNORECASE), messages
+
+
+def build_hyperscan_database(*pattern_lists):
+    """
+    Compile (compiled pattern, message) lists into a Hyperscan database
+
+    Pattern ids match the SECURITY_PATTERN_MESSAGES indexes from
+    combine_security_patterns. Returns None when Hyperscan is not installed
+    or rejects a pattern, so callers fall back to the re scan.
+    """
+    if hyperscan is None:
+        return None
+    expressions, flags = [], []
+    for pattern, _ in (entry for patterns in pattern_lists for entry in patterns):
+        expressions.append(pattern.pattern.encode('utf-8'))
+        pattern_flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_SINGLEMATCH
+        if pattern.flags & re.DOTALL:
+            pattern_flags |= hyperscan.HS_FLAG_DOTALL
+        flags.append(pattern_flags)
+    try:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=flags,
+        )
+    except hyperscan.error:
+        return None
+    return database
+
 
 class SecureFormMixin:
     """
@@ -15,7 +80,9 @@ class SecureFormMixin:
     """
     
     # Dangerous patterns to detect and prevent
-    DANGEROUS_PATTERNS = [
+    # Patterns are compiled once at class definition, flags included, so
+    # validate_field_security calls Pattern.search directly
+    DANGEROUS_PATTERNS = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), message) for pattern, message in [
         (r'<script[^>]*>.*?</script>', 'Script tags are not allowed'),
         (r'javascript:', 'JavaScript protocols are not allowed'),
         (r'vbscript:', 'VBScript protocols are not allowed'),
@@ -27,9 +94,9 @@ class SecureFormMixin:
         (r'alert\s*\(', 'Alert functions are not allowed'),
         (r'confirm\s*\(', 'Confirm functions are not allowed'),
         (r'prompt\s*\(', 'Prompt functions are not allowed'),
-    ]
+    ]]
     
-    SQL_INJECTION_PATTERNS = [
+    SQL_INJECTION_PATTERNS = [(re.compile(pattern, re.IGNORECASE), message) for pattern, message in [
         (r'union\s+select', 'SQL injection attempts are not allowed'),
         (r'drop\s+table', 'Database modification attempts are not allowed'),
         (r'delete\s+from', 'Database deletion attempts are not allowed'),
@@ -39,7 +106,25 @@ class SecureFormMixin:
         (r'/\*.*\*/', 'SQL block comments are not allowed'),
         (r"'\s*or\s*'", 'SQL injection patterns are not allowed'),
         (r"1\s*=\s*1", 'SQL tautologies are not allowed'),
-    ]
+    ]]
+    
+    # All of the above, indexed like SECURITY_PATTERN_MESSAGES
+    SECURITY_PATTERNS = DANGEROUS_PATTERNS + SQL_INJECTION_PATTERNS
+    # ... and in one regex, so clean values are rejected in a single scan
+    SECURITY_PATTERNS_RE, SECURITY_PATTERN_MESSAGES = combine_security_patterns(
+        DANGEROUS_PATTERNS, SQL_INJECTION_PATTERNS
+    )
+    # Same patterns as a Hyperscan database when available (None otherwise).
+    # A database has one scratch space, so scans are serialized per process.
+    SECURITY_PATTERNS_DB = build_hyperscan_database(DANGEROUS_PATTERNS, SQL_INJECTION_PATTERNS)
+    SECURITY_PATTERNS_DB_LOCK = threading.Lock()
+    
+    # Every pattern above needs at least one of these characters to match:
+    # tag/protocol/handler/call syntax (< : = ( ), SQL comment and quote
+    # characters (- * '), or whitespace between SQL keywords. Values without
+    # any of them (names, numbers, emails, ...) skip the pattern scan.
+    # Keep in sync when adding patterns.
+    SECURITY_TRIGGER_RE = re.compile(r"[<:=(\-*'\s]")
     
     def clean(self):
         """Enhanced clean method with security validation"""
@@ -75,17 +160,10 @@ class SecureFormMixin:
     def validate_field_security(self, field_name, value):
         """Validate individual field for security issues"""
         violations = []
-        value_lower = value.lower()
-        
-        # Check for dangerous patterns
-        for pattern, message in self.DANGEROUS_PATTERNS:
-            if re.search(pattern, value_lower, re.IGNORECASE | re.DOTALL):
-                violations.append(f"{field_name}: {message}")
         
-        # Check for SQL injection patterns
-        for pattern, message in self.SQL_INJECTION_PATTERNS:
-            if re.search(pattern, value_lower, re.IGNORECASE):
-                violations.append(f"{field_name}: {message}")
+        # Check for dangerous and SQL injection patterns in a single pass
+        for pattern_id in self.find_security_patterns(value):
+            violations.append(f"{field_name}: {self.SECURITY_PATTERN_MESSAGES[pattern_id]}")
         
         # Check field length limits
         max_length = getattr(settings, 'MAX_INPUT_LENGTH', 10000)
@@ -98,6 +176,31 @@ class SecureFormMixin:
         
         return violations
     
+    def find_security_patterns(self, value):
+        """Return the ids of the security patterns found in value, in pattern order"""
+        pattern_ids = []
+        
+        # Cheap prefilter: one C-level character-class search
+        if not self.SECURITY_TRIGGER_RE.search(value):
+            return pattern_ids
+        
+        if self.SECURITY_PATTERNS_DB is not None:
+            def on_match(pattern_id, start, end, flags, context):
+                pattern_ids.append(pattern_id)  # SINGLEMATCH: reported once per pattern
+            
+            with self.SECURITY_PATTERNS_DB_LOCK:
+                self.SECURITY_PATTERNS_DB.scan(value.encode('utf-8'), match_event_handler=on_match)
+            return sorted(pattern_ids)
+        
+        # The combined regex is only a gate; search each pattern on a hit so
+        # overlapping matches are all reported, as with Hyperscan above
+        if not self.SECURITY_PATTERNS_RE.search(value):
+            return pattern_ids
+        return [
+            pattern_id for pattern_id, (pattern, _) in enumerate(self.SECURITY_PATTERNS)
+            if pattern.search(value)
+        ]
+    
     def sanitize_data(self, data):
         """Sanitize form data"""
         sanitized_data = {}
@@ -118,15 +221,10 @@ class SecureFormMixin:
         # Remove null bytes
         text = text.replace('\x00', '')
         
-        # Trim excessive whitespace while preserving intentional formatting
-        lines = text.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            # Strip trailing whitespace but preserve leading whitespace for formatting
-            cleaned_line = line.rstrip()
-            cleaned_lines.append(cleaned_line)
-        
-        text = '\n'.join(cleaned_lines)
+        # Trim excessive whitespace while preserving intentional formatting:
+        # strip trailing whitespace on every line (leading whitespace is kept)
+        # in one pass instead of splitting, rstripping and re-joining lines
+        text = TRAILING_WHITESPACE_RE.sub('', text)
         
         # Limit length
         max_length = getattr(settings, 'MAX_INPUT_LENGTH', 10000)
@@ -145,10 +243,10 @@ class SecureModelForm(SecureFormMixin, forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Add security-enhanced widgets where appropriate
+        max_length = getattr(settings, 'MAX_INPUT_LENGTH', 10000)  # Read once, not per field
         for field_name, field in self.fields.items():
             if isinstance(field, forms.CharField):
                 # Add maxlength attribute to prevent excessively long inputs
-                max_length = getattr(settings, 'MAX_INPUT_LENGTH', 10000)
                 current_maxlength = field.widget.attrs.get('maxlength', max_length)
                 # Convert to int if it's a string, otherwise use default
                 try:
@@ -160,10 +258,10 @@ class SecureModelForm(SecureFormMixin, forms.ModelForm):
                     field.widget.attrs['maxlength'] = max_length
                 
                 # Add input validation attributes
-                field.widget.attrs.update({
-                    'data-security-validated': 'true',
-                    'autocomplete': 'off' if 'password' in field_name.lower() else field.widget.attrs.get('autocomplete'),
-                })
+                field.widget.attrs.update(
+                    SECURITY_WIDGET_ATTRS,
+                    autocomplete='off' if 'password' in field_name.lower() else field.widget.attrs.get('autocomplete'),
+                )
 
 
 class SecureForm(SecureFormMixin, forms.Form):
@@ -175,10 +273,10 @@ class SecureForm(SecureFormMixin, forms.Form):
         super().__init__(*args, **kwargs)
         
         # Add security-enhanced widgets where appropriate
-        for field_name, field in self.fields.items():
+        max_length = getattr(settings, 'MAX_INPUT_LENGTH', 10000)  # Read once, not per field
+        for field in self.fields.values():
             if isinstance(field, forms.CharField):
                 # Add maxlength attribute
-                max_length = getattr(settings, 'MAX_INPUT_LENGTH', 10000)
                 if hasattr(field.widget.attrs, 'get'):
                     current_maxlength = field.widget.attrs.get('maxlength', max_length)
                     # Convert to int if it's a string, otherwise use default
@@ -191,9 +289,7 @@ class SecureForm(SecureFormMixin, forms.Form):
                         field.widget.attrs['maxlength'] = max_length
                 
                 # Add security attributes
-                field.widget.attrs.update({
-                    'data-security-validated': 'true',
-                })
+                field.widget.attrs.update(SECURITY_WIDGET_ATTRS)
 
 
 # CSRF Token Validation Decorator for Views
@@ -223,8 +319,10 @@ class CSRFProtectedMixin:
         """Ensure CSRF protection is active"""
         from django.middleware.csrf import get_token
         
-        # Ensure CSRF token is generated for this request
-        get_token(request)
+        # Ensure CSRF token is generated for this request (skipped when the
+        # request already carries the CSRF cookie)
+        if not request.META.get('CSRF_COOKIE'):
+            get_token(request)
         
         return super().dispatch(request, *args, **kwargs)
     
@@ -0,0 +1,80 @@
+"""
+TAMS Logging Handlers
+Keeps log file I/O off the request thread
+"""
+
+import atexit
+import copy
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class QueuedFileHandler(QueueHandler):
+    """
+    File handler that writes from a background thread
+
+    Request threads only put records on an in-process queue; a QueueListener
+    thread drains it into a regular FileHandler. The listener is started on
+    first use in each process, so it also works in forked gunicorn workers.
+    """
+
+    file_handler_class = logging.FileHandler
+
+    def __init__(self, filename, mode='a', encoding=None, **kwargs):
+        super().__init__(queue.SimpleQueue())
+        self.file_handler = self.file_handler_class(filename, mode=mode, encoding=encoding, **kwargs)
+        self._listener = None
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+
+    def setFormatter(self, fmt):
+        # Formatting happens in the listener thread via the file handler
+        self.file_handler.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Defer formatting to the listener thread; only resolve the message
+        # arguments now so the record no longer references request objects
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record):
+        if self._listener_pid != os.getpid():
+            self._start_listener()
+        super().emit(record)
+
+    def _start_listener(self):
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener = QueueListener(self.queue, self.file_handler, respect_handler_level=True)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+        atexit.register(self._stop_listener)  # Flush queued records on shutdown
+
+    def _stop_listener(self):
+        with self._listener_lock:
+            if self._listener is not None and self._listener_pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+    def close(self):
+        self._stop_listener()
+        self.file_handler.close()
+        super().close()
+
+
+class QueuedRotatingFileHandler(QueuedFileHandler):
+    """
+    RotatingFileHandler that writes from a background thread
+
+    Accepts the usual maxBytes/backupCount arguments; size checks and
+    rollover happen in the listener thread.
+    """
+
+    file_handler_class = RotatingFileHandler
@@ -5,6 +5,26 @@ from django.utils.decorators import method_decorator
 from django.contrib import messages
 
 
+# Protected URLs that require authentication
+PROTECTED_PATHS = (
+    '/dashboard/',
+    '/clients/',
+    '/vendors/',
+    '/transactions/',
+    '/bank_accounts/',
+    '/settlements/',
+    '/reports/',
+    '/settings/',
+)
+
+# Cache control headers to prevent browser caching of protected pages
+NO_CACHE_HEADERS = {
+    'Cache-Control': 'no-cache, no-store, must-revalidate, private',
+    'Pragma': 'no-cache',
+    'Expires': '0',
+}
+
+
 class NoCacheAfterLogoutMiddleware:
     """
     Middleware to prevent caching of authenticated pages and redirect 
@@ -16,20 +36,8 @@ class NoCacheAfterLogoutMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
         
-        # Define protected URLs that require authentication
-        protected_paths = [
-            '/dashboard/',
-            '/clients/',
-            '/vendors/',
-            '/transactions/',
-            '/bank_accounts/',
-            '/settlements/',
-            '/reports/',
-            '/settings/',
-        ]
-        
-        # Check if current path needs protection
-        needs_auth = any(request.path.startswith(path) for path in protected_paths)
+        # Check if current path needs protection (one startswith call over the tuple)
+        needs_auth = request.path.startswith(PROTECTED_PATHS)
         
         if needs_auth:
             # If user is not authenticated, redirect to login
@@ -38,9 +46,7 @@ class NoCacheAfterLogoutMiddleware:
                 return redirect('/auth/login/')
             
             # Add cache control headers to prevent browser caching
-            response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
-            response['Pragma'] = 'no-cache'
-            response['Expires'] = '0'
+            response.headers.update(NO_CACHE_HEADERS)
             
         return response
 
@@ -3,12 +3,16 @@ TAMS Security Middleware and Authentication Enhancements
 Implements brute force protection and enhanced security features
 """
 
+import html
 import logging
+import threading
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from django.contrib.auth import authenticate
 from django.contrib.auth.backends import ModelBackend
 from django.core.cache import cache
+from django.db import close_old_connections
 from django.http import HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
 from django.conf import settings
@@ -19,13 +23,49 @@ from django.dispatch import receiver
 import json
 import re
 from trust_account_project.validators import SQLInjectionValidator  # SECURITY FIX M3
+from trust_account_project.api_hardening import get_client_ip, get_sliding_window_count, record_sliding_windows
 
 logger = logging.getLogger(__name__)
 
+try:
+    from apps.audit.utils import log_user_action  # COMPLIANCE CONTROL #6
+except ImportError:
+    log_user_action = None
+    logger.warning(
+        "SECURITY: apps.audit is not available; account lockouts "
+        "(COMPLIANCE CONTROL #6) will not be written to the audit trail"
+    )
+
+# Background writer for lockout audit entries. Created on first use, so
+# gunicorn workers forked after --preload don't each start one for nothing
+# (it is only needed when log_user_action is available).
+_audit_executor = None
+_audit_executor_lock = threading.Lock()
+
+
+def get_audit_executor():
+    """Return the lockout audit thread pool, creating it on first use"""
+    global _audit_executor
+    if _audit_executor is None:
+        with _audit_executor_lock:
+            if _audit_executor is None:
+                _audit_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bf-audit')
+    return _audit_executor
+
+# Login endpoints guarded by BruteForceProtectionMiddleware (a tuple, so a
+# single str.startswith call checks them all)
+LOGIN_PATHS = ('/admin/login/', '/auth/login/', '/accounts/login/')
+
 class BruteForceProtectionMiddleware(MiddlewareMixin):
     """
     Middleware to implement brute force protection for authentication attempts
     """
+
+    # Cache key prefixes, completed with the client IP
+    ATTEMPT_LOG_PREFIX = 'brute_force_attempt_log_'
+    RAPID_LOG_PREFIX = 'brute_force_rapid_log_'
+    BLOCKED_PREFIX = 'brute_force_blocked_'
+    USERNAME_PREFIX = 'brute_force_username_'
     
     def __init__(self, get_response):
         self.get_response = get_response
@@ -37,7 +77,9 @@ class BruteForceProtectionMiddleware(MiddlewareMixin):
     
     def process_request(self, request):
         """Check if IP is blocked before processing login attempts"""
-        if self.is_login_request(request):
+        # Only login POSTs are gated - rendering the login form (GET) can't
+        # fail and shouldn't cost cache lookups
+        if request.method == 'POST' and self.is_login_request(request):
             client_ip = self.get_client_ip(request)
             
             # Check if IP is currently blocked
@@ -55,103 +97,68 @@ class BruteForceProtectionMiddleware(MiddlewareMixin):
     
     def process_response(self, request, response):
         """Process response to track failed login attempts"""
-        if self.is_login_request(request) and request.method == 'POST':
-            client_ip = self.get_client_ip(request)
+        # Only login POSTs are tracked; return everything else before any
+        # IP parsing or cache work
+        if request.method != 'POST' or not self.is_login_request(request):
+            return response
+        
+        client_ip = self.get_client_ip(request)
+        
+        # Check if login was successful (redirect or successful status)
+        if response.status_code in [200, 302] and not self.has_form_errors(response):
+            # Successful login - reset failed attempts
+            self.reset_failed_attempts(client_ip)
+            logger.info(f"Successful login from IP: {client_ip}")
+        else:
+            # Failed login - increment counter
+            failed_attempts = self.record_failed_attempt(
+                client_ip, getattr(request, '_failed_login_username', None)
+            )
             
-            # Check if login was successful (redirect or successful status)
-            if response.status_code in [200, 302] and not self.has_form_errors(response):
-                # Successful login - reset failed attempts
-                self.reset_failed_attempts(client_ip)
-                logger.info(f"Successful login from IP: {client_ip}")
-            elif request.method == 'POST':
-                # Failed login - increment counter
-                self.record_failed_attempt(client_ip)
+            # Check if we should block the IP
+            if failed_attempts >= self.max_attempts:
+                self.block_ip(client_ip, duration=self.lockout_duration)
+                logger.warning(f"IP {client_ip} blocked after {failed_attempts} failed attempts")
                 
-                # Check if we should block the IP
-                failed_attempts = self.get_failed_attempts(client_ip)
-                if failed_attempts >= self.max_attempts:
-                    self.block_ip(client_ip, duration=self.lockout_duration)
-                    logger.warning(f"IP {client_ip} blocked after {failed_attempts} failed attempts")
-                    
-                    # Return blocked response for this attempt
-                    return self.create_blocked_response(request)
-                else:
-                    remaining = self.max_attempts - failed_attempts
-                    logger.warning(f"Failed login from IP: {client_ip} ({remaining} attempts remaining)")
+                # Return blocked response for this attempt
+                return self.create_blocked_response(request)
+            else:
+                remaining = self.max_attempts - failed_attempts
+                logger.warning(f"Failed login from IP: {client_ip} ({remaining} attempts remaining)")
         
         return response
     
     def is_login_request(self, request):
         """Check if request is a login attempt"""
-        login_urls = ['/admin/login/', '/auth/login/', '/accounts/login/']
-        return any(request.path.startswith(url) for url in login_urls)
+        return request.path.startswith(LOGIN_PATHS)
     
     def get_client_ip(self, request):
         """Get client IP address, handling proxies"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
+        return get_client_ip(request)
     
-    def get_cache_key(self, ip, key_type):
-        """Generate cache key for IP tracking"""
-        return f"brute_force_{key_type}_{ip}"
-    
-    def record_failed_attempt(self, ip):
-        """Record a failed login attempt"""
-        cache_key = self.get_cache_key(ip, 'attempts')
-        
-        # Get current attempts and increment
-        attempts = cache.get(cache_key, [])
-        current_time = time.time()
-        
-        # Add current attempt
-        attempts.append(current_time)
-        
-        # Clean up old attempts (older than lockout duration)
-        cutoff_time = current_time - self.lockout_duration
-        attempts = [attempt for attempt in attempts if attempt > cutoff_time]
-        
-        # Store updated attempts list
-        cache.set(cache_key, attempts, self.lockout_duration)
-        
-        # Also track rapid attempts (for rate limiting)
-        rapid_key = self.get_cache_key(ip, 'rapid')
-        rapid_attempts = cache.get(rapid_key, [])
-        rapid_attempts.append(current_time)
-        
-        # Keep only attempts from last minute
-        rapid_cutoff = current_time - self.cooldown_period
-        rapid_attempts = [attempt for attempt in rapid_attempts if attempt > rapid_cutoff]
-        cache.set(rapid_key, rapid_attempts, self.cooldown_period)
-        
-        return len(attempts)
+    def record_failed_attempt(self, ip, username=None):
+        """Record a failed login attempt and return the attempts in the lockout window"""
+        # Username tracked for audit logging rides along in the same pipeline
+        values = [(self.USERNAME_PREFIX + ip, username, self.lockout_duration)] if username else []
+        # Each window is a Redis sorted set of attempt timestamps: old entries
+        # are pruned server-side and concurrent logins can't lose updates
+        (attempts, _), _ = record_sliding_windows([
+            (self.ATTEMPT_LOG_PREFIX + ip, self.lockout_duration),
+            # Also track rapid attempts (for rate limiting)
+            (self.RAPID_LOG_PREFIX + ip, self.cooldown_period),
+        ], values)
+        return attempts
     
     def get_failed_attempts(self, ip):
         """Get count of failed attempts for IP"""
-        cache_key = self.get_cache_key(ip, 'attempts')
-        attempts = cache.get(cache_key, [])
-        
-        # Clean up old attempts
-        current_time = time.time()
-        cutoff_time = current_time - self.lockout_duration
-        recent_attempts = [attempt for attempt in attempts if attempt > cutoff_time]
-        
-        if len(recent_attempts) != len(attempts):
-            # Update cache with cleaned list
-            cache.set(cache_key, recent_attempts, self.lockout_duration)
-        
-        return len(recent_attempts)
+        return get_sliding_window_count(self.ATTEMPT_LOG_PREFIX + ip, self.lockout_duration)
     
     def is_too_many_rapid_attempts(self, ip):
         """Check if IP has too many rapid attempts"""
-        rapid_key = self.get_cache_key(ip, 'rapid')
-        rapid_attempts = cache.get(rapid_key, [])
+        rapid_attempts = get_sliding_window_count(self.RAPID_LOG_PREFIX + ip, self.cooldown_period)
         
         # More than 3 attempts in the last minute is considered rapid
-        return len(rapid_attempts) > 3
+        return rapid_attempts > 3
     
     def block_ip(self, ip, duration):
         """
@@ -159,18 +166,21 @@ class BruteForceProtectionMiddleware(MiddlewareMixin):
 
         COMPLIANCE CONTROL #6: Account lockout after failed logins
         """
-        cache_key = self.get_cache_key(ip, 'blocked')
+        cache_key = self.BLOCKED_PREFIX + ip
         block_until = time.time() + duration
         cache.set(cache_key, block_until, duration)
 
         # Log security event
         logger.error(f"SECURITY: IP {ip} blocked for {duration} seconds due to brute force attempts")
 
-        # COMPLIANCE CONTROL #6: Log lockout to audit trail
-        try:
-            from apps.audit.utils import log_user_action
-            from datetime import datetime, timedelta
+        # COMPLIANCE CONTROL #6: Log lockout to audit trail, off the request
+        # thread so the blocked response doesn't wait on the audit INSERT
+        if log_user_action is not None:
+            get_audit_executor().submit(self.log_lockout, ip, duration, block_until)
 
+    def log_lockout(self, ip, duration, block_until):
+        """Write an ACCOUNT_LOCKED audit entry (runs on the audit executor)"""
+        try:
             # Get username from recent failed attempts if available
             username = self.get_username_for_ip(ip) or 'unknown'
 
@@ -190,10 +200,14 @@ class BruteForceProtectionMiddleware(MiddlewareMixin):
             )
         except Exception as e:
             logger.error(f"Failed to log account lockout to audit trail: {str(e)}")
+        finally:
+            # Executor threads outlive the request cycle that normally closes
+            # Django's per-thread DB connection
+            close_old_connections()
     
     def is_ip_blocked(self, ip):
         """Check if IP is currently blocked"""
-        cache_key = self.get_cache_key(ip, 'blocked')
+        cache_key = self.BLOCKED_PREFIX + ip
         block_until = cache.get(cache_key)
         
         if block_until and time.time() < block_until:
@@ -206,31 +220,37 @@ class BruteForceProtectionMiddleware(MiddlewareMixin):
     
     def reset_failed_attempts(self, ip):
         """Reset failed attempts counter for IP"""
-        attempt_key = self.get_cache_key(ip, 'attempts')
-        rapid_key = self.get_cache_key(ip, 'rapid')
-        username_key = self.get_cache_key(ip, 'username')
-        cache.delete(attempt_key)
-        cache.delete(rapid_key)
-        cache.delete(username_key)
+        cache.delete_many([
+            self.ATTEMPT_LOG_PREFIX + ip,
+            self.RAPID_LOG_PREFIX + ip,
+            self.USERNAME_PREFIX + ip,
+        ])
 
     def track_username_for_ip(self, ip, username):
         """Track username associated with IP for audit logging"""
-        username_key = self.get_cache_key(ip, 'username')
+        username_key = self.USERNAME_PREFIX + ip
         cache.set(username_key, username, self.lockout_duration)
 
     def get_username_for_ip(self, ip):
         """Get username associated with IP"""
-        username_key = self.get_cache_key(ip, 'username')
+        username_key = self.USERNAME_PREFIX + ip
         return cache.get(username_key)
     
     def has_form_errors(self, response):
         """Check if response contains form errors (indicating failed login)"""
+        # Django's LoginView (behind /auth/login/ and /admin/login/) redirects
+        # on success - no need to look at the body
+        if response.status_code == 302:
+            return False
+        
+        # On failure it re-renders the form; its errors answer the question
+        # without decoding the page
         if hasattr(response, 'context_data') and response.context_data:
             form = response.context_data.get('form')
-            if form and hasattr(form, 'errors') and form.errors:
-                return True
+            if form is not None and hasattr(form, 'errors'):
+                return bool(form.errors)
         
-        # For admin login, check content for error indicators
+        # Fallback for other responses: check content for error indicators
         if hasattr(response, 'content'):
             content_str = response.content.decode('utf-8', errors='ignore').lower()
             error_indicators = [
@@ -299,12 +319,26 @@ class EnhancedInputValidationMixin:
         r'prompt\s*\(',               # JavaScript prompt
     ]
     
+    # Each pattern compiled once, plus all of them as one alternation so
+    # clean text is rejected in a single pass. The alternation is only a
+    # gate: matches consume text, so one pass could hide an overlapping
+    # pattern (e.g. javascript: inside a script tag).
+    COMPILED_DANGEROUS_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in DANGEROUS_PATTERNS]
+    DANGEROUS_PATTERNS_RE = re.compile(
+        '|'.join(f'(?:{pattern})' for pattern in DANGEROUS_PATTERNS),
+        re.IGNORECASE,
+    )
+    
+    # Every pattern above contains one of these literals (tags need '<',
+    # handlers '=', calls '(' and both protocols 'script:'), so text without
+    # any of them skips the full scan. Keep in sync when adding patterns.
+    DANGEROUS_TRIGGER_RE = re.compile(r'[<=(]|script:', re.IGNORECASE)
+    
     def validate_input_security(self, data):
         """
         Validate input data for security threats
         Returns (is_safe, violations_found)
         """
-        import re
         violations = []
         
         if isinstance(data, dict):
@@ -318,14 +352,14 @@ class EnhancedInputValidationMixin:
     
     def _check_string_security(self, text, field_name):
         """Check individual string for security violations"""
-        import re
         violations = []
         
-        text_lower = text.lower()
-        
-        for pattern in self.DANGEROUS_PATTERNS:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                violations.append(f"Potentially dangerous content in {field_name}: {pattern}")
+        # Gate on the trigger and combined scans, then search each pattern so
+        # every violation is reported; re.IGNORECASE already handles case
+        if self.DANGEROUS_TRIGGER_RE.search(text) and self.DANGEROUS_PATTERNS_RE.search(text):
+            for pattern, compiled in zip(self.DANGEROUS_PATTERNS, self.COMPILED_DANGEROUS_PATTERNS):
+                if compiled.search(text):
+                    violations.append(f"Potentially dangerous content in {field_name}: {pattern}")
         
         # Check for SQL injection patterns (SECURITY FIX M3: using centralized validator)
         is_valid, sql_violations = SQLInjectionValidator.validate(text, field_name=field_name)
@@ -349,7 +383,6 @@ class EnhancedInputValidationMixin:
             text = text[:max_length]
         
         # Basic HTML entity encoding for display
-        import html
         return html.escape(text)
 
 
@@ -363,10 +396,7 @@ class SecureAuthenticationBackend(ModelBackend):
         """Enhanced authentication with security logging"""
         
         # Get client IP for logging
-        client_ip = 'unknown'
-        if request:
-            client_ip = request.META.get('HTTP_X_FORWARDED_FOR', 
-                                       request.META.get('REMOTE_ADDR', 'unknown'))
+        client_ip = get_client_ip(request) if request else 'unknown'
         
         try:
             # Attempt normal authentication
@@ -396,15 +426,12 @@ def log_failed_login(sender, credentials, request, **kwargs):
     client_ip = 'unknown'
 
     if request:
-        client_ip = request.META.get('HTTP_X_FORWARDED_FOR',
-                                   request.META.get('REMOTE_ADDR', 'unknown'))
+        client_ip = get_client_ip(request)
 
-        # Track username for this IP (for audit logging)
-        try:
-            from django.core.cache import cache
-            cache_key = f"brute_force_username_{client_ip}"
-            cache.set(cache_key, username, 900)  # 15 minutes
-        except Exception:
-            pass
+        # Track username for this IP (for audit logging); the cache write is
+        # batched into BruteForceProtectionMiddleware's failed-attempt pipeline.
+        # The middleware reads it from the Django HttpRequest, so unwrap a DRF
+        # Request if one was passed instead.
+        getattr(request, '_request', request)._failed_login_username = username
 
     logger.warning(f"SECURITY: Failed login attempt - Username: '{username}', IP: {client_ip}")
\ No newline at end of file
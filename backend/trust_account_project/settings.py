@@ -66,7 +66,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',  # Django's built-in CSRF protection (sufficient)
+    'trust_account_project.csrf_protection.CachedCsrfViewMiddleware',  # Django's built-in CSRF protection, reusing earlier token checks
     # REMOVED: 'trust_account_project.csrf_protection.AdvancedCSRFProtectionMiddleware' - Redundant with Django's CSRF
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'trust_account_project.threat_detection.AdvancedThreatDetectionMiddleware',  # SECURITY FIX: Brute force protection
@@ -83,16 +83,11 @@ ROOT_URLCONF = 'trust_account_project.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # App template directories are found through APP_DIRS; only the
+        # project-level directory needs listing (the cached loader is enabled
+        # automatically)
         'DIRS': [
             BASE_DIR / 'templates',
-            BASE_DIR / 'apps' / 'dashboard' / 'templates',
-            BASE_DIR / 'apps' / 'clients' / 'templates',
-            BASE_DIR / 'apps' / 'vendors' / 'templates',
-            # BASE_DIR / 'apps' / 'transactions' / 'templates',  # Consolidated
-            BASE_DIR / 'apps' / 'bank_accounts' / 'templates',
-            BASE_DIR / 'apps' / 'settlements' / 'templates',
-            BASE_DIR / 'apps' / 'reports' / 'templates',
-            BASE_DIR / 'apps' / 'settings' / 'templates',
         ],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -119,6 +114,14 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', DB_CONFIG.get('db_password', 'secure_password_123')),
         'HOST': os.environ.get('DB_HOST', DB_CONFIG.get('db_host', 'bank_account_db')),
         'PORT': int(os.environ.get('DB_PORT', DB_CONFIG.get('db_port', 5432))),
+        # Persistent connections - reuse a connection across requests instead of
+        # reconnecting (TCP + auth handshake) on every request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,  # Discard connections dropped by the server before reuse
+        # Behind PgBouncer in transaction-pooling mode, set DB_PGBOUNCER=true
+        # (and DB_CONN_MAX_AGE=0): named server-side cursors don't survive
+        # the pooler handing each transaction to a different server connection
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER', 'False').lower() == 'true',
     }
 }
 
@@ -131,7 +134,7 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'trust_account_project.validators.StreamingCommonPasswordValidator',  # No per-worker password set
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -153,6 +156,10 @@ STATICFILES_DIRS = [
 
 # WhiteNoise configuration for static file serving
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# collectstatic writes .gz and .br siblings (brotli via whitenoise[brotli]), so
+# WhiteNoise serves pre-compressed files and never compresses per request.
+# Hashed files already get a far-future immutable Cache-Control header.
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True  # Don't ship unhashed copies of every asset
 
 # Media files
 MEDIA_URL = '/media/'
@@ -174,6 +181,7 @@ SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = None  # Allow cross-origin cookies for frontend-backend separation
 SESSION_COOKIE_DOMAIN = None  # Allow cookies on any domain (localhost or production)
 SESSION_SAVE_EVERY_REQUEST = True
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'  # Rolling-expiry save is a Redis SET, not a SQL UPDATE
 
 # Security settings - Enhanced for production
 SECURE_BROWSER_XSS_FILTER = True
@@ -191,9 +199,11 @@ SECURE_PROXY_SSL_HEADER = None  # Configure for reverse proxy if needed
 SECURE_REFERRER_POLICY = 'strict-origin-when-cross-origin'
 
 # Enhanced Authentication Backend
+# SecureAuthenticationBackend subclasses ModelBackend, so it is the only entry:
+# listing ModelBackend as well re-ran every failed password check and every
+# permission lookup a second time
 AUTHENTICATION_BACKENDS = [
     'trust_account_project.security.SecureAuthenticationBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
 
 # Brute Force Protection Settings
@@ -201,6 +211,17 @@ BRUTE_FORCE_MAX_ATTEMPTS = 5           # Max failed attempts before blocking
 BRUTE_FORCE_LOCKOUT_DURATION = 900     # Block duration in seconds (15 minutes)
 BRUTE_FORCE_COOLDOWN = 60               # Rapid attempt cooldown (1 minute)
 
+# Reverse proxies (IPs or CIDR networks) whose X-Forwarded-For header is
+# trusted for the client IP; leave empty to trust it from any peer
+TRUSTED_PROXIES = tuple(
+    network.strip() for network in os.environ.get('TRUSTED_PROXIES', '').split(',') if network.strip()
+)
+
+# Client IPs (health checks, internal load balancers) that skip threat detection
+THREAT_DETECTION_ALLOWLIST = tuple(
+    ip.strip() for ip in os.environ.get('THREAT_DETECTION_ALLOWLIST', '').split(',') if ip.strip()
+)
+
 # Enhanced Input Validation Settings
 MAX_INPUT_LENGTH = 10000                # Maximum input field length
 ENABLE_INPUT_SANITIZATION = True        # Enable automatic input sanitization
@@ -213,10 +234,13 @@ CACHES = {
         'TIMEOUT': 900,  # 15 minutes default timeout
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-            'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
-            'SERIALIZER': 'django_redis.serializers.json.JSONSerializer',
+            # MessagePack: compact binary encoding for the counters, timestamp
+            # lists and dicts cached by the security middleware (no pickle)
+            'SERIALIZER': 'django_redis.serializers.msgpack.MSGPackSerializer',
+            'CONNECTION_POOL_KWARGS': {'max_connections': 50},
         },
         'KEY_PREFIX': 'iolta_prod',  # Namespace for cache keys
+        'VERSION': 2,  # Bumped with the serializer so old JSON entries are never decoded
     }
 }
 
@@ -233,8 +257,9 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'trust_account_project.logging_handlers.QueuedFileHandler',  # Writes from a background thread
             'filename': BASE_DIR / 'logs' / 'django.log',
+            'delay': True,  # Open the file on first record, not in every process at startup
             'formatter': 'verbose',
         },
     },
@@ -252,6 +277,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # PRODUCTION: Require authentication for all API requests
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.api.renderers.ORJSONRenderer',  # Same JSON as JSONRenderer, encoded by orjson
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.api.parsers.CachedJSONParser',  # Reuses JSON body parsed by APISecurityMiddleware
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
         'rest_framework.throttling.UserRateThrottle',
@@ -263,8 +297,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_FILTER_BACKENDS': [
+        # SearchFilter is opted into per view (with its search_fields)
         'django_filters.rest_framework.DjangoFilterBackend',
-        'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
 }
@@ -278,22 +312,3 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
-
-# JWT Configuration
-from datetime import timedelta
-
-SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(hours=8),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-    'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
-    'ALGORITHM': 'HS256',
-    'SIGNING_KEY': SECRET_KEY,
-    'VERIFYING_KEY': None,
-    'AUTH_HEADER_TYPES': ('Bearer',),
-    'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
-    'USER_ID_FIELD': 'id',
-    'USER_ID_CLAIM': 'user_id',
-    'TOKEN_TYPE_CLAIM': 'token_type',
-}
@@ -37,7 +37,9 @@ ENABLE_STATIC_FILES = True
 FORCE_SERVE_STATIC = True
 
 # ALLOWED HOSTS - Configure for your production domain
-ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '').split(',') or CONFIG.get('application', {}).get('allowed_hosts', [])
+ALLOWED_HOSTS = [
+    host.strip() for host in os.environ.get('ALLOWED_HOSTS', '').split(',') if host.strip()
+] or CONFIG.get('application', {}).get('allowed_hosts', [])
 if not ALLOWED_HOSTS:
     raise ValueError("ALLOWED_HOSTS must be configured for production")
 
@@ -88,15 +90,11 @@ ROOT_URLCONF = 'trust_account_project.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # App template directories are found through APP_DIRS; only the
+        # project-level directory needs listing (the cached loader is enabled
+        # automatically)
         'DIRS': [
             BASE_DIR / 'templates',
-            BASE_DIR / 'apps' / 'dashboard' / 'templates',
-            BASE_DIR / 'apps' / 'clients' / 'templates',
-            BASE_DIR / 'apps' / 'vendors' / 'templates',
-            BASE_DIR / 'apps' / 'bank_accounts' / 'templates',
-            BASE_DIR / 'apps' / 'settlements' / 'templates',
-            BASE_DIR / 'apps' / 'reports' / 'templates',
-            BASE_DIR / 'apps' / 'settings' / 'templates',
         ],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -126,7 +124,11 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', DB_CONFIG.get('db_password')),
         'HOST': os.environ.get('DB_HOST', DB_CONFIG.get('db_host')),
         'PORT': int(os.environ.get('DB_PORT', DB_CONFIG.get('db_port', 5432))),
-        'CONN_MAX_AGE': 600,  # Connection pooling
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),  # Connection pooling
+        'CONN_HEALTH_CHECKS': True,  # Discard connections dropped by the server before reuse
+        # Set DB_PGBOUNCER=true (and DB_CONN_MAX_AGE=0) behind PgBouncer in
+        # transaction-pooling mode, which can't keep server-side cursors open
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER', 'False').lower() == 'true',
         'OPTIONS': {
             'connect_timeout': 10,
         }
@@ -148,7 +150,7 @@ AUTH_PASSWORD_VALIDATORS = [
         }
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'trust_account_project.validators.StreamingCommonPasswordValidator',  # No per-worker password set
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -176,6 +178,10 @@ STATICFILES_DIRS = [
 
 # WhiteNoise configuration for efficient static file serving
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# collectstatic writes .gz and .br siblings (brotli via whitenoise[brotli]), so
+# WhiteNoise serves pre-compressed files and never compresses per request.
+# Hashed files already get a far-future immutable Cache-Control header.
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True  # Don't ship unhashed copies of every asset
 
 # Media files
 MEDIA_URL = '/media/'
@@ -199,11 +205,14 @@ SESSION_COOKIE_SECURE = True  # HTTPS only
 SESSION_COOKIE_HTTPONLY = True  # No JavaScript access
 SESSION_COOKIE_SAMESITE = 'Lax'  # CSRF protection
 SESSION_SAVE_EVERY_REQUEST = True
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'  # Rolling-expiry save is a Redis SET, not a SQL UPDATE
 
 # Enhanced Authentication Backend
+# SecureAuthenticationBackend subclasses ModelBackend, so it is the only entry:
+# listing ModelBackend as well re-ran every failed password check and every
+# permission lookup a second time
 AUTHENTICATION_BACKENDS = [
     'trust_account_project.security.SecureAuthenticationBackend',
-    'django.contrib.auth.backends.ModelBackend',
 ]
 
 # ============================================================================
@@ -240,6 +249,17 @@ BRUTE_FORCE_MAX_ATTEMPTS = 5           # Max failed attempts before blocking
 BRUTE_FORCE_LOCKOUT_DURATION = 900     # Block duration in seconds (15 minutes)
 BRUTE_FORCE_COOLDOWN = 60               # Rapid attempt cooldown (1 minute)
 
+# Reverse proxies (IPs or CIDR networks) whose X-Forwarded-For header is
+# trusted for the client IP; leave empty to trust it from any peer
+TRUSTED_PROXIES = tuple(
+    network.strip() for network in os.environ.get('TRUSTED_PROXIES', '').split(',') if network.strip()
+)
+
+# Client IPs (health checks, internal load balancers) that skip threat detection
+THREAT_DETECTION_ALLOWLIST = tuple(
+    ip.strip() for ip in os.environ.get('THREAT_DETECTION_ALLOWLIST', '').split(',') if ip.strip()
+)
+
 # ============================================================================
 # INPUT VALIDATION
 # ============================================================================
@@ -251,14 +271,20 @@ ENABLE_INPUT_SANITIZATION = True
 # CACHING - PRODUCTION
 # ============================================================================
 
+# Shared Redis cache: brute-force, throttle and threat-detection state must be
+# visible to every gunicorn worker, not kept in a per-process LocMemCache
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', '6379')}/1",
         'TIMEOUT': 900,
         'OPTIONS': {
-            'MAX_ENTRIES': 10000,
-        }
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'SERIALIZER': 'django_redis.serializers.msgpack.MSGPackSerializer',
+            'CONNECTION_POOL_KWARGS': {'max_connections': 50},
+        },
+        'KEY_PREFIX': 'iolta_prod',
+        'VERSION': 2,
     }
 }
 
@@ -287,24 +313,27 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'trust_account_project.logging_handlers.QueuedRotatingFileHandler',  # Writes from a background thread
             'filename': BASE_DIR / 'logs' / 'django.log',
+            'delay': True,  # Open the file on first record, not in every process at startup
             'maxBytes': 10485760,  # 10MB
             'backupCount': 5,
             'formatter': 'verbose',
         },
         'error_file': {
             'level': 'ERROR',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'trust_account_project.logging_handlers.QueuedRotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'django_error.log',
+            'delay': True,
             'maxBytes': 10485760,
             'backupCount': 5,
             'formatter': 'verbose',
         },
         'security_file': {
             'level': 'WARNING',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'trust_account_project.logging_handlers.QueuedRotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'security.log',
+            'delay': True,
             'maxBytes': 10485760,
             'backupCount': 10,
             'formatter': 'verbose',
@@ -340,13 +369,13 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',  # REQUIRE AUTHENTICATION
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',  # JSON only (no browsable API)
+        'apps.api.renderers.ORJSONRenderer',  # JSON only (no browsable API)
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_FILTER_BACKENDS': [
+        # SearchFilter is opted into per view (with its search_fields)
         'django_filters.rest_framework.DjangoFilterBackend',
-        'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
     'EXCEPTION_HANDLER': 'trust_account_project.exceptions.custom_exception_handler',
@@ -357,7 +386,11 @@ REST_FRAMEWORK = {
 # ============================================================================
 
 # Only allow your production frontend domain
-CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ORIGINS', '').split(',') or CONFIG.get('application', {}).get('cors_origins', [])
+# (''.split(',') is [''], which is truthy - drop empty entries so the
+# account.json fallback applies when CORS_ORIGINS is unset)
+CORS_ALLOWED_ORIGINS = tuple(
+    origin.strip() for origin in os.environ.get('CORS_ORIGINS', '').split(',') if origin.strip()
+) or tuple(CONFIG.get('application', {}).get('cors_origins', []))
 
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = [
@@ -372,28 +405,6 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
-# ============================================================================
-# JWT CONFIGURATION - PRODUCTION
-# ============================================================================
-
-from datetime import timedelta
-
-SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(hours=8),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-    'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
-    'ALGORITHM': 'HS256',
-    'SIGNING_KEY': SECRET_KEY,
-    'VERIFYING_KEY': None,
-    'AUTH_HEADER_TYPES': ('Bearer',),
-    'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
-    'USER_ID_FIELD': 'id',
-    'USER_ID_CLAIM': 'user_id',
-    'TOKEN_TYPE_CLAIM': 'token_type',
-}
-
 # ============================================================================
 # ADMIN INTERFACE - PRODUCTION (Restricted)
 # ============================================================================
@@ -402,7 +413,7 @@ SIMPLE_JWT = {
 ADMIN_ENABLED = os.environ.get('ADMIN_ENABLED', 'False').lower() == 'true'
 
 # If admin is needed, restrict to internal IPs
-INTERNAL_IPS = os.environ.get('INTERNAL_IPS', '').split(',')
+INTERNAL_IPS = tuple(ip.strip() for ip in os.environ.get('INTERNAL_IPS', '').split(',') if ip.strip())
 
 # ============================================================================
 # DATABASE CONNECTION SECURITY
@@ -412,13 +423,16 @@ INTERNAL_IPS = os.environ.get('INTERNAL_IPS', '').split(',')
 # Database should only be accessible from application servers
 # Recommendation: Use private network or VPN for database access
 
-print("=" * 80)
-print("PRODUCTION SETTINGS LOADED")
-print("=" * 80)
-print(f"DEBUG: {DEBUG}")
-print(f"ALLOWED_HOSTS: {ALLOWED_HOSTS}")
-print(f"SECURE_SSL_REDIRECT: {SECURE_SSL_REDIRECT}")
-print(f"SESSION_COOKIE_SECURE: {SESSION_COOKIE_SECURE}")
-print(f"CSRF_COOKIE_SECURE: {CSRF_COOKIE_SECURE}")
-print(f"ADMIN_ENABLED: {ADMIN_ENABLED}")
-print("=" * 80)
+# Startup banner, opt-in: settings are imported by every gunicorn worker and
+# manage.py command, and LOGGING isn't configured yet at this point
+if os.environ.get('SETTINGS_BANNER') == '1':
+    print("=" * 80)
+    print("PRODUCTION SETTINGS LOADED")
+    print("=" * 80)
+    print(f"DEBUG: {DEBUG}")
+    print(f"ALLOWED_HOSTS: {ALLOWED_HOSTS}")
+    print(f"SECURE_SSL_REDIRECT: {SECURE_SSL_REDIRECT}")
+    print(f"SESSION_COOKIE_SECURE: {SESSION_COOKIE_SECURE}")
+    print(f"CSRF_COOKIE_SECURE: {CSRF_COOKIE_SECURE}")
+    print(f"ADMIN_ENABLED: {ADMIN_ENABLED}")
+    print("=" * 80)
@@ -4,12 +4,11 @@ Real-time detection and response to sophisticated attacks
 """
 
 import time
-import json
 import logging
-import hashlib
 import re
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
+import threading
+from collections import Counter, deque
+from itertools import chain
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import SuspiciousOperation
@@ -19,6 +18,11 @@ from django.contrib.auth.signals import user_login_failed, user_logged_in
 from django.dispatch import receiver
 from django.db import connection
 from trust_account_project.validators import SQLInjectionValidator  # SECURITY FIX M3
+from trust_account_project.api_hardening import (
+    CacheBatch, add_to_set, append_to_capped_list, get_cached_list,
+    get_client_ip, get_request_json, increment_rate_counter, iter_json_strings,
+)
+from trust_account_project.forms import build_hyperscan_database
 import ipaddress
 
 logger = logging.getLogger(__name__)
@@ -28,6 +32,20 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
     Advanced threat detection and response system
     """
     
+    # request.META keys of the client-IP override headers checked by
+    # detect_attack_signatures (X-Forwarded-For, X-Originating-IP,
+    # X-Remote-IP, X-Cluster-Client-IP)
+    SUSPICIOUS_HEADER_KEYS = (
+        'HTTP_X_FORWARDED_FOR',
+        'HTTP_X_ORIGINATING_IP',
+        'HTTP_X_REMOTE_IP',
+        'HTTP_X_CLUSTER_CLIENT_IP',
+    )
+    
+    # Seconds an IP found unblocked in the cache is trusted without asking
+    # again; blocks set by another worker take at most this long to apply here
+    BLOCK_RECHECK_INTERVAL = 5
+    
     def __init__(self, get_response):
         self.get_response = get_response
         
@@ -101,12 +119,84 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
             ]
         }
         
+        # Compile every pattern once as a (label, regex) check, plus a
+        # Hyperscan database per group when available (ids index the checks)
+        # and a combined alternation to prefilter values for the re path
+        self.pattern_checks = self.compile_checks(self.threat_patterns)
+        self.pattern_db = build_hyperscan_database(
+            [(pattern, label) for label, pattern in self.pattern_checks]
+        )
+        self.pattern_prefilter = self.combine_checks(self.pattern_checks)
+        self.signature_checks = self.compile_checks({
+            'bot_signature': self.attack_signatures['bot_patterns'],
+            'suspicious_ua': self.attack_signatures['suspicious_user_agents'],
+        })
+        self.signature_db = build_hyperscan_database(
+            [(pattern, label) for label, pattern in self.signature_checks]
+        )
+        self.signature_prefilter = self.combine_checks(self.signature_checks)
+        # A database has one scratch space, so scans are serialized per process
+        self.scan_lock = threading.Lock()
+        
+        # Trusted client IPs (health checks, load balancers) are not analyzed
+        self.allowlist = frozenset(getattr(settings, 'THREAT_DETECTION_ALLOWLIST', ()))
+        # Per-process copy of known blocks (ip -> block_until), so repeat
+        # requests from a blocked IP are refused without a cache lookup, and
+        # of recent "not blocked" answers (ip -> recheck time)
+        self.blocked_locally = {}
+        self.unblocked_locally = {}
+        
         super().__init__(get_response)
     
+    @staticmethod
+    def compile_checks(pattern_groups):
+        """
+        Flatten {group: [pattern, ...]} into ("group:pattern", compiled) checks
+
+        Patterns are written in lowercase and compiled case-sensitively:
+        scan_values lowercases each value once for the re path, which is much
+        cheaper than IGNORECASE case-folding inside every search. Hyperscan
+        matches caselessly on its own.
+        """
+        return [
+            (f"{group}:{pattern}", re.compile(pattern))
+            for group, patterns in pattern_groups.items()
+            for pattern in patterns
+        ]
+    
+    @staticmethod
+    def combine_checks(checks):
+        """Compile all checks into one regex that matches wherever any of them does"""
+        return re.compile('|'.join(f'(?:{pattern.pattern})' for _, pattern in checks))
+    
+    def scan_values(self, checks, database, prefilter, values):
+        """
+        Return the label of every (check, value) match, check by check
+
+        A check matching several values is reported once per value, as the
+        nested re.search loops did. With Hyperscan each value is scanned once
+        for all checks. Otherwise each value gets one pass of the combined
+        prefilter, and only values it matches are searched check by check.
+        """
+        if database is None:
+            values = [value for value in map(str.lower, values) if prefilter.search(value)]
+            return [label for label, pattern in checks for value in values if pattern.search(value)]
+        
+        matched = [set() for _ in checks]
+        for index, value in enumerate(values):
+            def on_match(check_id, start, end, flags, context):
+                matched[check_id].add(index)  # SINGLEMATCH: once per check per value
+            
+            with self.scan_lock:
+                database.scan(value.encode('utf-8'), match_event_handler=on_match)
+        return [label for (label, _), hits in zip(checks, matched) for _ in hits]
+    
     def process_request(self, request):
         """Analyze request for threats"""
         
         client_ip = self.get_client_ip(request)
+        if client_ip in self.allowlist:
+            return None
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
         # Check if IP is already blocked
@@ -114,34 +204,25 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
             logger.error(f"THREAT: Blocked IP attempted access: {client_ip}")
             return self.threat_response('Access denied', 403)
         
-        # Threat analysis
+        # Threat analysis: (detector, arguments, points per finding), cheapest
+        # first. A score of 50 already means a block, so the remaining
+        # (cache-backed) detectors are skipped once it is reached.
+        detection_stages = (
+            (self.detect_attack_signatures, (request,), 8),  # Signature-based detection
+            (self.detect_attack_patterns, (request,), 10),  # Pattern-based detection
+            (self.detect_geographic_anomalies, (request, client_ip), 3),  # Geographic and time-based analysis
+            (self.detect_behavioral_anomalies, (request, client_ip), 5),  # Behavioral anomaly detection
+            (self.detect_session_anomalies, (request,), 7),  # Session-based threat detection
+        )
         threat_score = 0
         detected_threats = []
         
-        # 1. Pattern-based detection
-        pattern_threats = self.detect_attack_patterns(request)
-        threat_score += len(pattern_threats) * 10
-        detected_threats.extend(pattern_threats)
-        
-        # 2. Behavioral anomaly detection
-        behavioral_threats = self.detect_behavioral_anomalies(request, client_ip)
-        threat_score += len(behavioral_threats) * 5
-        detected_threats.extend(behavioral_threats)
-        
-        # 3. Signature-based detection
-        signature_threats = self.detect_attack_signatures(request)
-        threat_score += len(signature_threats) * 8
-        detected_threats.extend(signature_threats)
-        
-        # 4. Geographic and time-based analysis
-        geo_threats = self.detect_geographic_anomalies(request, client_ip)
-        threat_score += len(geo_threats) * 3
-        detected_threats.extend(geo_threats)
-        
-        # 5. Session-based threat detection
-        session_threats = self.detect_session_anomalies(request)
-        threat_score += len(session_threats) * 7
-        detected_threats.extend(session_threats)
+        for detector, args, weight in detection_stages:
+            threats = detector(*args)
+            threat_score += len(threats) * weight
+            detected_threats.extend(threats)
+            if threat_score >= 50:
+                break
         
         # Record threat intelligence
         self.record_threat_intelligence(client_ip, user_agent, threat_score, detected_threats)
@@ -166,36 +247,37 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
         """Detect attack patterns in request"""
         detected_patterns = []
         
-        # Get all request data
-        all_data = {}
-        all_data.update(request.GET.dict())
-        all_data.update(request.POST.dict())
-        
-        # Include request path and headers
-        all_data['__path__'] = request.path
-        all_data['__user_agent__'] = request.META.get('HTTP_USER_AGENT', '')
-        all_data['__referer__'] = request.META.get('HTTP_REFERER', '')
-        
-        # Check body for JSON data
-        # BUG FIX: Skip body access for file uploads (multipart/form-data)
-        # Django reads request.FILES first, making request.body inaccessible
-        # Check content_type BEFORE accessing body (hasattr triggers access!)
-        content_type = getattr(request, 'content_type', '')
-        if content_type.startswith('application/json'):
-            try:
-                body_data = json.loads(request.body.decode('utf-8'))
-                if isinstance(body_data, dict):
-                    all_data.update(body_data)
-            except:
-                pass
+        # Collect the string values to scan straight from the QueryDicts
+        # (no intermediate dict copies of GET/POST). lists() yields every
+        # value of a repeated parameter, not only the last one
+        def iter_request_values():
+            for key, param_values in chain(request.GET.lists(), request.POST.lists()):
+                for value in param_values:
+                    yield key, value
+            # Include request path and headers
+            yield '__path__', request.path
+            yield '__user_agent__', request.META.get('HTTP_USER_AGENT', '')
+            yield '__referer__', request.META.get('HTTP_REFERER', '')
+            # Check body for JSON data
+            # BUG FIX: Skip body access for file uploads (multipart/form-data)
+            # Django reads request.FILES first, making request.body inaccessible
+            # Check content_type BEFORE accessing body (hasattr triggers access!)
+            content_type = getattr(request, 'content_type', '')
+            # An empty body has nothing to scan; don't read or parse it
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+            if content_length > 0 and content_type.startswith('application/json'):
+                body_data = get_request_json(request)  # Parsed once, shared with DRF
+                # Each decoded string value is scored on its own, never the
+                # raw body, so matches across fields can't add threat points
+                if body_data is not None:
+                    yield from iter_json_strings(body_data)
+        
+        values = [value for key, value in iter_request_values() if isinstance(value, str)]
         
         # Check each pattern category
-        for pattern_type, patterns in self.threat_patterns.items():
-            for pattern in patterns:
-                for key, value in all_data.items():
-                    if isinstance(value, str):
-                        if re.search(pattern, value, re.IGNORECASE):
-                            detected_patterns.append(f"{pattern_type}:{pattern}")
+        detected_patterns.extend(self.scan_values(
+            self.pattern_checks, self.pattern_db, self.pattern_prefilter, values
+        ))
         
         return detected_patterns
     
@@ -205,40 +287,30 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
         
         # Request frequency analysis
         minute_key = f"requests_per_minute_{client_ip}_{int(time.time() // 60)}"
-        requests_this_minute = cache.get(minute_key, 0) + 1
-        cache.set(minute_key, requests_this_minute, 60)
+        hour_key = f"unique_param_set_{client_ip}_{int(time.time() // 3600)}"
+        total_key = f"error_rate_total_{client_ip}"
+        errors_key = f"error_rate_errors_{client_ip}"
+        
+        # All of this stage's cache traffic goes out in one pipeline: the
+        # atomic request counters, the parameter-name set (only this request's
+        # names are sent, the hourly set stays in Redis) and the error count
+        batch = CacheBatch()
+        batch.incr(minute_key, 60)
+        batch.incr(total_key, 3600)
+        batch.add_to_set(hour_key, {*request.GET.keys(), *request.POST.keys()}, 3600)
+        batch.get(errors_key, 0)
+        requests_this_minute, total_requests, unique_params, error_count = batch.execute()
         
         if requests_this_minute > self.anomaly_thresholds['requests_per_minute']:
             anomalies.append('excessive_request_rate')
         
         # Parameter diversity analysis
-        hour_key = f"unique_params_{client_ip}_{int(time.time() // 3600)}"
-        # Get param_set from cache (stored as list for JSON serialization)
-        param_list = cache.get(hour_key, [])
-        param_set = set(param_list)  # Convert list back to set
-
-        # Add current parameters to set
-        current_params = set()
-        current_params.update(request.GET.keys())
-        current_params.update(request.POST.keys())
-
-        param_set.update(current_params)
-        # Store as list for Redis JSON serialization
-        cache.set(hour_key, list(param_set), 3600)
-        
-        if len(param_set) > self.anomaly_thresholds['unique_params_per_hour']:
+        if unique_params > self.anomaly_thresholds['unique_params_per_hour']:
             anomalies.append('parameter_enumeration')
         
-        # Error rate analysis
-        error_key = f"error_rate_{client_ip}"
-        error_data = cache.get(error_key, {'total': 0, 'errors': 0})
-        error_data['total'] += 1
-        
-        # This will be updated in process_response if there's an error
-        cache.set(error_key, error_data, 3600)
-        
-        if error_data['total'] > 10:  # Only analyze after 10+ requests
-            error_rate = error_data['errors'] / error_data['total']
+        # Error rate analysis; errors are counted in process_response
+        if total_requests > 10:  # Only analyze after 10+ requests
+            error_rate = error_count / total_requests
             if error_rate > self.anomaly_thresholds['error_rate_threshold']:
                 anomalies.append('high_error_rate')
         
@@ -248,31 +320,20 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
         """Detect known attack tool signatures"""
         signatures = []
         
-        user_agent = request.META.get('HTTP_USER_AGENT', '').lower()
-        
-        # Check for bot patterns
-        for pattern in self.attack_signatures['bot_patterns']:
-            if re.search(pattern, user_agent, re.IGNORECASE):
-                signatures.append(f"bot_signature:{pattern}")
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
         
-        # Check for suspicious user agents
-        for pattern in self.attack_signatures['suspicious_user_agents']:
-            if re.search(pattern, user_agent, re.IGNORECASE):
-                signatures.append(f"suspicious_ua:{pattern}")
+        # Check for bot patterns and suspicious user agents (case-insensitive
+        # in both scan paths, so no lowercased copy is needed)
+        signatures.extend(self.scan_values(
+            self.signature_checks, self.signature_db, self.signature_prefilter, [user_agent]
+        ))
         
         # Check for unusual request patterns
         if request.method in ['POST', 'PUT'] and not request.content_type:
             signatures.append('missing_content_type')
         
         # Check for suspicious headers
-        suspicious_headers = [
-            'X-Forwarded-For',
-            'X-Originating-IP', 
-            'X-Remote-IP',
-            'X-Cluster-Client-IP'
-        ]
-        
-        header_count = sum(1 for header in suspicious_headers if request.META.get(f'HTTP_{header.upper().replace("-", "_")}'))
+        header_count = sum(1 for key in self.SUSPICIOUS_HEADER_KEYS if request.META.get(key))
         if header_count > 2:
             signatures.append('header_manipulation')
         
@@ -294,17 +355,16 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
             anomalies.append('invalid_ip_format')
         
         # Time-based analysis
-        current_hour = datetime.now().hour
+        current_hour = time.localtime().tm_hour  # No datetime object needed for the hour
         
         # Unusual hours for business application (optional)
         if current_hour < 5 or current_hour > 23:
             # Check if this user typically accesses during these hours
             unusual_time_key = f"unusual_time_{client_ip}"
-            unusual_count = cache.get(unusual_time_key, 0)
-            if unusual_count > 10:  # Regular off-hours user
+            unusual_count = increment_rate_counter(unusual_time_key, 86400)  # 24 hours
+            if unusual_count > 11:  # Regular off-hours user
                 pass
             else:
-                cache.set(unusual_time_key, unusual_count + 1, 86400)  # 24 hours
                 anomalies.append('unusual_access_time')
         
         return anomalies
@@ -337,18 +397,13 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
                     anomalies.append('stale_session')
             
             # Concurrent session detection
-            user_sessions_key = f"user_sessions_{request.user.id}"
-            # Get from cache as list, convert to set for operations
-            user_sessions_list = cache.get(user_sessions_key, [])
-            user_sessions = set(user_sessions_list)
+            user_sessions_key = f"user_session_set_{request.user.id}"
             current_session = request.session.session_key
 
             if current_session:
-                user_sessions.add(current_session)
-                # Convert set back to list for Redis JSON serialization
-                cache.set(user_sessions_key, list(user_sessions), 3600)
+                user_sessions = add_to_set(user_sessions_key, [current_session], 3600)
 
-                if len(user_sessions) > 3:  # More than 3 concurrent sessions
+                if user_sessions > 3:  # More than 3 concurrent sessions
                     anomalies.append('multiple_concurrent_sessions')
         
         return anomalies
@@ -365,28 +420,14 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
             'threats': detected_threats,
         }
         
-        # Add to threat history
-        history_key = f"threat_history_{client_ip}"
-        history = cache.get(history_key, [])
-        history.append(threat_data)
-        
-        # Keep only last 100 entries
-        if len(history) > 100:
-            history = history[-100:]
+        # Add to threat history, keeping only the last 100 entries
+        batch = CacheBatch()
+        batch.append_to_capped_list(f"threat_log_{client_ip}", threat_data, 100, 86400)  # 24 hours
         
-        cache.set(history_key, history, 86400)  # 24 hours
-        
-        # Global threat tracking
+        # Global threat tracking, keeping only the last 1000 threats
         if threat_score > 0:
-            global_threats_key = "global_threats"
-            global_threats = cache.get(global_threats_key, [])
-            global_threats.append(threat_data)
-            
-            # Keep only last 1000 global threats
-            if len(global_threats) > 1000:
-                global_threats = global_threats[-1000:]
-            
-            cache.set(global_threats_key, global_threats, 86400)
+            batch.append_to_capped_list("global_threat_log", threat_data, 1000, 86400)
+        batch.execute()
     
     def process_response(self, request, response):
         """Update threat intelligence based on response"""
@@ -394,47 +435,54 @@ class AdvancedThreatDetectionMiddleware(MiddlewareMixin):
         client_ip = self.get_client_ip(request)
         
         # Update error rate tracking
-        error_key = f"error_rate_{client_ip}"
-        error_data = cache.get(error_key, {'total': 0, 'errors': 0})
-        
         if response.status_code >= 400:
-            error_data['errors'] += 1
-            cache.set(error_key, error_data, 3600)
+            increment_rate_counter(f"error_rate_errors_{client_ip}", 3600)
         
         return response
     
     def block_ip(self, ip, duration=3600):
         """Block IP address"""
         cache_key = f"blocked_ip_{ip}"
-        cache.set(cache_key, time.time() + duration, duration)
+        block_until = time.time() + duration
+        cache.set(cache_key, block_until, duration)
+        self.remember_block(ip, block_until)
         
         # Log security incident
         logger.critical(f"SECURITY: IP {ip} blocked for {duration} seconds due to threat detection")
     
     def is_ip_blocked(self, ip):
         """Check if IP is blocked"""
+        now = time.time()
+        if self.blocked_locally.get(ip, 0) > now:
+            return True
+        if self.unblocked_locally.get(ip, 0) > now:
+            return False
+        
         cache_key = f"blocked_ip_{ip}"
         block_until = cache.get(cache_key)
-        return block_until and time.time() < block_until
+        if block_until and now < block_until:
+            self.remember_block(ip, block_until)
+            return True
+        
+        if len(self.unblocked_locally) >= 10000:
+            self.unblocked_locally.clear()  # Bound memory under an IP-rotating attack
+        self.unblocked_locally[ip] = now + self.BLOCK_RECHECK_INTERVAL
+        return False
+    
+    def remember_block(self, ip, block_until):
+        """Keep a block in process memory until it expires"""
+        if len(self.blocked_locally) >= 10000:
+            self.blocked_locally.clear()  # Bound memory under an IP-rotating attack
+        self.blocked_locally[ip] = block_until
+        self.unblocked_locally.pop(ip, None)
     
     def add_to_watchlist(self, ip):
         """Add IP to watchlist for monitoring"""
-        watchlist_key = "security_watchlist"
-        # Get from cache as list, convert to set for operations
-        watchlist_list = cache.get(watchlist_key, [])
-        watchlist = set(watchlist_list)
-        watchlist.add(ip)
-        # Convert set back to list for Redis JSON serialization
-        cache.set(watchlist_key, list(watchlist), 86400)  # 24 hours
+        add_to_set("security_watchlist_set", [ip], 86400)  # 24 hours
     
     def get_client_ip(self, request):
         """Get client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0].strip()
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
+        return get_client_ip(request)
     
     def threat_response(self, message, status_code):
         """Create threat response"""
@@ -453,48 +501,42 @@ class ThreatIntelligenceManager:
     @staticmethod
     def get_threat_summary():
         """Get threat intelligence summary"""
-        global_threats = cache.get("global_threats", [])
+        global_threats = get_cached_list("global_threat_log")
         
         # Analyze threats from last 24 hours
         current_time = time.time()
-        recent_threats = [
+        recent_threats = (
             threat for threat in global_threats 
             if current_time - threat['timestamp'] < 86400
-        ]
+        )
         
         # Count threat types
-        threat_counts = defaultdict(int)
-        ip_counts = defaultdict(int)
+        threat_counts = Counter()
+        ip_counts = Counter()
         
         for threat in recent_threats:
             ip_counts[threat['ip']] += 1
-            for threat_type in threat['threats']:
-                threat_counts[threat_type] += 1
+            threat_counts.update(threat['threats'])
         
         return {
-            'total_threats': len(recent_threats),
+            'total_threats': ip_counts.total(),
             'unique_ips': len(ip_counts),
-            'top_threat_types': dict(sorted(threat_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
-            'top_threat_ips': dict(sorted(ip_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
+            'top_threat_types': dict(threat_counts.most_common(10)),
+            'top_threat_ips': dict(ip_counts.most_common(10)),
         }
     
     @staticmethod
     def get_ip_threat_profile(ip):
         """Get threat profile for specific IP"""
-        history_key = f"threat_history_{ip}"
-        history = cache.get(history_key, [])
+        history = get_cached_list(f"threat_log_{ip}")
         
         if not history:
             return None
         
         total_score = sum(threat['threat_score'] for threat in history)
-        threat_types = []
+        threat_type_counts = Counter()
         for threat in history:
-            threat_types.extend(threat['threats'])
-        
-        threat_type_counts = defaultdict(int)
-        for threat_type in threat_types:
-            threat_type_counts[threat_type] += 1
+            threat_type_counts.update(threat['threats'])
         
         return {
             'ip': ip,
@@ -507,35 +549,46 @@ class ThreatIntelligenceManager:
         }
 
 
+# SQL injection patterns checked in failed-login usernames, compiled once,
+# with a combined regex so clean usernames take a single search
+LOGIN_SQL_PATTERNS = [
+    (pattern, re.compile(pattern, re.IGNORECASE))
+    for pattern in (
+        r"admin'\s*--",
+        r"'\s*or\s*'1'\s*=\s*'1",
+        r"union\s+select",
+        r"drop\s+table",
+    )
+]
+LOGIN_SQL_PREFILTER = re.compile(
+    '|'.join(f'(?:{pattern})' for pattern, _ in LOGIN_SQL_PATTERNS), re.IGNORECASE
+)
+
+# Common attack usernames
+ATTACK_USERNAMES = frozenset({
+    'admin', 'administrator', 'root', 'test', 'guest', 'user',
+    'sa', 'postgres', 'mysql', 'oracle', 'demo',
+})
+
+
 # Signal handlers for additional threat detection
 @receiver(user_login_failed)
 def detect_login_threats(sender, credentials, request, **kwargs):
     """Detect threats in failed login attempts"""
-    client_ip = request.META.get('REMOTE_ADDR', 'unknown')
+    client_ip = get_client_ip(request)
     username = credentials.get('username', 'unknown')
     
     # Check for suspicious login patterns
     suspicious_indicators = []
     
     # SQL injection in username
-    sql_patterns = [
-        r"admin'\s*--",
-        r"'\s*or\s*'1'\s*=\s*'1",
-        r"union\s+select",
-        r"drop\s+table",
-    ]
-    
-    for pattern in sql_patterns:
-        if re.search(pattern, username, re.IGNORECASE):
-            suspicious_indicators.append(f"sql_injection_login:{pattern}")
+    if LOGIN_SQL_PREFILTER.search(username):
+        for pattern, compiled in LOGIN_SQL_PATTERNS:
+            if compiled.search(username):
+                suspicious_indicators.append(f"sql_injection_login:{pattern}")
     
     # Common attack usernames
-    attack_usernames = [
-        'admin', 'administrator', 'root', 'test', 'guest', 'user',
-        'sa', 'postgres', 'mysql', 'oracle', 'demo'
-    ]
-    
-    if username.lower() in attack_usernames:
+    if username.lower() in ATTACK_USERNAMES:
         suspicious_indicators.append("common_attack_username")
     
     if suspicious_indicators:
@@ -551,22 +604,19 @@ def detect_login_threats(sender, credentials, request, **kwargs):
         }
         
         # Add to threat history
-        history_key = f"threat_history_{client_ip}"
-        history = cache.get(history_key, [])
-        history.append(threat_data)
-        cache.set(history_key, history, 86400)
+        append_to_capped_list(f"threat_log_{client_ip}", threat_data, 100, 86400)
 
 
 @receiver(user_logged_in)
 def detect_successful_login_threats(sender, user, request, **kwargs):
     """Detect threats in successful logins"""
-    client_ip = request.META.get('REMOTE_ADDR', 'unknown')
+    client_ip = get_client_ip(request)
     
     # Check login timing patterns
-    current_time = datetime.now()
+    current_hour = time.localtime().tm_hour
     
     # Check for unusual login times
-    if current_time.hour < 5 or current_time.hour > 23:
+    if current_hour < 5 or current_hour > 23:
         logger.info(f"SECURITY: Off-hours login by {user} from {client_ip}")
     
     # Check for geographic anomalies (basic)
@@ -12,9 +12,21 @@ Benefits:
 - Consistency across all validators
 """
 
+import gzip
 import re
 import logging
+from django.contrib.auth.password_validation import CommonPasswordValidator
 from django.core.exceptions import ValidationError
+from django.utils.translation import gettext as _
+
+try:
+    # Optional: RE2 matches in linear time (no backtracking), so crafted
+    # input can't trigger catastrophic regex backtracking on the per-request
+    # SQL scan. Not in requirements.txt: google-re2 ships no musllinux
+    # wheels, so the Alpine image falls back to re.
+    import re2 as sql_pattern_engine
+except ImportError:
+    sql_pattern_engine = re
 
 logger = logging.getLogger(__name__)
 
@@ -48,8 +60,16 @@ class SQLInjectionValidator:
     ]
 
     # Pre-compile patterns for performance
-    # Regex compilation happens ONCE at startup instead of on every request
-    COMPILED_PATTERNS = [re.compile(p, re.IGNORECASE) for p in PATTERNS]
+    # Regex compilation happens ONCE at startup instead of on every request.
+    # Case-insensitivity is an inline (?i) flag, understood by both re and
+    # RE2, so validate() matches the text as-is without a lowercased copy.
+    COMPILED_PATTERNS = [sql_pattern_engine.compile(f'(?i){p}') for p in PATTERNS]
+
+    # All patterns as one alternation, so clean text (the common case) is
+    # rejected in a single pass instead of one search per pattern
+    COMBINED_PATTERN = sql_pattern_engine.compile(
+        '(?i)' + '|'.join(f'(?:{p})' for p in PATTERNS)
+    )
 
     @classmethod
     def validate(cls, text, field_name='input'):
@@ -73,14 +93,19 @@ class SQLInjectionValidator:
         if not isinstance(text, str):
             return (True, [])
 
-        text_lower = text.lower()
+        if not cls.COMBINED_PATTERN.search(text):
+            return (True, [])
+
         violations = []
 
-        for pattern in cls.COMPILED_PATTERNS:
-            if pattern.search(text_lower):
-                violations.append(pattern.pattern)
+        # Something matched: name every pattern found. finditer on the
+        # alternation would miss overlapping hits (e.g. '1=1' inside
+        # 'or 1=1'), so the individual patterns are checked here
+        for pattern, compiled in zip(cls.PATTERNS, cls.COMPILED_PATTERNS):
+            if compiled.search(text):
+                violations.append(pattern)
                 logger.warning(
-                    f"SECURITY: SQL injection pattern detected in {field_name}: {pattern.pattern}"
+                    f"SECURITY: SQL injection pattern detected in {field_name}: {pattern}"
                 )
 
         is_valid = len(violations) == 0
@@ -138,3 +163,36 @@ class PasswordComplexityValidator:
             "Your password must contain at least one uppercase letter, "
             "one lowercase letter, one number, and one special character."
         )
+
+
+class StreamingCommonPasswordValidator(CommonPasswordValidator):
+    """
+    CommonPasswordValidator that doesn't keep the password list in memory
+
+    Django's version loads its ~20k-entry list into a set that stays resident
+    in every worker that has ever validated a password. Password changes are
+    rare, so this streams the gzipped list on each check instead.
+    """
+    def __init__(self, password_list_path=CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH):
+        if password_list_path is CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH:
+            password_list_path = self.DEFAULT_PASSWORD_LIST_PATH
+        self.password_list_path = password_list_path
+
+    def iter_passwords(self):
+        """Yield lines of the password list, gzipped or plain text like Django"""
+        try:
+            with gzip.open(self.password_list_path, 'rt', encoding='utf-8') as f:
+                yield from f
+        except OSError:
+            # Not gzipped: Django's validator falls back to a plain-text list
+            with open(self.password_list_path) as f:
+                yield from f
+
+    def validate(self, password, user=None):
+        """Reject passwords found in the common-password list"""
+        password = password.lower().strip()
+        if any(line.strip() == password for line in self.iter_passwords()):
+            raise ValidationError(
+                _('This password is too common.'),
+                code='password_too_common',
+            )